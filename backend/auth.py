@@ -67,29 +67,51 @@
 #     return user
 
 
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from typing import NamedTuple
+import hashlib
 import os
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 
-from database import SessionLocal
+from sqlalchemy import select
+
+from database import AsyncSessionLocal
 from models import User
+from services.cache_service import AUTH_USER_CACHE, AUTH_NEGATIVE_CACHE
+from services.password_service import (
+    hash_password,  # noqa: F401 (re-exported)
+    verify_password,  # noqa: F401 (re-exported)
+    hash_password_async as _hash_password_async,
+    verify_password_async as _verify_password_async,
+    PasswordPoolFull
+)
 
 
 # ---------------- PASSWORD HASHING ----------------
+# bcrypt runs in services.password_service's process pool; the sync
+# hash_password / verify_password are re-exported for scripts.
+
+def _pool_full_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    password = password[:72]  # bcrypt hard limit
-    return pwd_context.hash(password)
+async def hash_password_async(password: str) -> str:
+    try:
+        return await _hash_password_async(password)
+    except PasswordPoolFull:
+        raise _pool_full_exception()
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    try:
+        return await _verify_password_async(plain, hashed)
+    except PasswordPoolFull:
+        raise _pool_full_exception()
 
 
 # ---------------- JWT CONFIG ----------------
@@ -97,6 +119,10 @@ def verify_password(plain: str, hashed: str) -> bool:
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
+# Put the user's id in the token ("uid") so routes that only need the id
+# skip the user lookup entirely
+JWT_INCLUDE_UID = os.getenv("JWT_INCLUDE_UID", "true").lower() == "true"
+
 
 def create_access_token(data: dict, expires_delta: int = 30):
     to_encode = data.copy()
@@ -105,45 +131,92 @@ def create_access_token(data: dict, expires_delta: int = 30):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-# ---------------- DATABASE DEP ----------------
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def token_claims(user: User) -> dict:
+    claims = {"sub": user.username}
+    if JWT_INCLUDE_UID:
+        claims["uid"] = user.id
+    return claims
 
 
 # ---------------- AUTH DEPENDENCY (NEW) ----------------
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    token = credentials.credentials
 
-    credentials_exception = HTTPException(
+class AuthUser(NamedTuple):
+    """Cached snapshot of the User columns routes read."""
+    id: int
+    username: str
+    email: str
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str):
+    """(payload, token_key); rejected tokens are remembered for a while."""
+    token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    if AUTH_NEGATIVE_CACHE.get(token_key):
+        raise _credentials_exception()
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+    except JWTError:
+        AUTH_NEGATIVE_CACHE.set(token_key, True)
+        raise _credentials_exception()
 
-        if username is None:
-            raise credentials_exception
+    if payload.get("sub") is None:
+        AUTH_NEGATIVE_CACHE.set(token_key, True)
+        raise _credentials_exception()
 
-    except JWTError:
-        raise credentials_exception
+    return payload, token_key
 
-    user = db.query(User).filter(User.username == username).first()
 
-    if user is None:
-        raise credentials_exception
+async def _load_user(username: str, token_key: str) -> AuthUser:
+    user = AUTH_USER_CACHE.get(username)
+    if user is not None:
+        return user
 
+    stamp = AUTH_USER_CACHE.stamp()
+    async with AsyncSessionLocal() as db:
+        row = await db.scalar(select(User).where(User.username == username))
+
+    if row is None:
+        AUTH_NEGATIVE_CACHE.set(token_key, True)
+        raise _credentials_exception()
+
+    user = AuthUser(id=row.id, username=row.username, email=row.email)
+    AUTH_USER_CACHE.set(username, user, stamp=stamp)
     return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> AuthUser:
+    """
+    The authenticated user. Served from AUTH_USER_CACHE for
+    AUTH_CACHE_TTL seconds; MySQL is only hit on a miss.
+    """
+    payload, token_key = _decode_token(credentials.credentials)
+    return await _load_user(payload["sub"], token_key)
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> int:
+    """
+    Just the user's id: read from the "uid" claim when the token has one,
+    so no database or cache lookup at all.
+    """
+    payload, token_key = _decode_token(credentials.credentials)
+
+    if payload.get("uid") is not None:
+        return int(payload["uid"])
+
+    return (await _load_user(payload["sub"], token_key)).id
@@ -0,0 +1,67 @@
+"""
+Embedding throughput with and without the micro-batching dispatcher,
+against a local stub that sleeps `--latency` seconds per request.
+
+    cd backend
+    python -m benchmarks.bench_embedding_batcher --texts 2000 --concurrency 200
+
+"unbatched" sends one HTTP request per text (the old embed_text);
+"batched" goes through vector_service.embed_text / EmbeddingBatcher.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("FAISS_DIR", tempfile.mkdtemp(prefix="bench_faiss_"))
+
+from benchmarks.stub_server import start_stub_server  # noqa: E402
+from services import vector_service  # noqa: E402
+from services.http_client import close_http_client  # noqa: E402
+
+
+async def run(embed_one, texts: list, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(text):
+        async with semaphore:
+            await embed_one(text)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(text) for text in texts))
+    return time.perf_counter() - start
+
+
+async def unbatched(text: str):
+    return (await vector_service.embed_texts([text]))[0]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    vector_service.EMBED_URL = f"{base_url}/embeddings"
+    texts = [f"message number {i}" for i in range(args.texts)]
+
+    try:
+        for name, embed_one in (("unbatched", unbatched), ("batched", vector_service.embed_text)):
+            before = server.RequestHandlerClass.request_count
+            elapsed = await run(embed_one, texts, args.concurrency)
+            requests = server.RequestHandlerClass.request_count - before
+            print(
+                f"{name:<10} {args.texts / elapsed:9.0f} texts/s   "
+                f"{requests:6d} HTTP requests   {elapsed:6.2f} s"
+            )
+    finally:
+        await close_http_client()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+Recall@k against Flat and single-query p50/p99 latency for each
+FAISS_INDEX_TYPE backend on a synthetic clustered corpus.
+
+    cd backend
+    python -m benchmarks.bench_faiss_index_types --sizes 100000 1000000
+    python -m benchmarks.bench_faiss_index_types --sizes 10000000 --dim 256
+
+Vectors are generated and added in chunks, but each index still holds
+its full corpus: 10M x 1536-d float32 is ~61 GB for Flat alone, so use
+a smaller --dim (or a big box) at that size. Tuning comes from the same
+FAISS_* env vars the backend uses.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from services import faiss_index
+
+EMBED_DIM = 1536  # text-embedding-3-small
+CHUNK = 100_000
+
+
+def corpus_chunks(size: int, dim: int, clusters: int, seed: int = 0):
+    """Gaussian blobs around random centres, roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype("float32")
+    for start in range(0, size, CHUNK):
+        count = min(CHUNK, size - start)
+        labels = rng.integers(0, clusters, size=count)
+        yield centres[labels] + 0.3 * rng.normal(size=(count, dim)).astype("float32")
+
+
+def build(index_type: str, size: int, dim: int, clusters: int):
+    train_size = min(size, 256 * 1024)
+    if not faiss_index.can_train(index_type, train_size):
+        return None
+
+    sample = np.vstack(list(corpus_chunks(train_size, dim, clusters, seed=1)))
+
+    index = faiss_index._base_index(index_type, dim, size)
+    start = time.perf_counter()
+    if index_type in faiss_index.TRAINED_TYPES:
+        index.train(sample)
+    for chunk in corpus_chunks(size, dim, clusters):
+        index.add(chunk)
+    faiss_index.configure(index)
+    return index, time.perf_counter() - start
+
+
+def latencies(index, queries: np.ndarray, k: int):
+    timings = []
+    ids = []
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), k)
+        timings.append(time.perf_counter() - start)
+        ids.append(found[0])
+    return np.array(timings) * 1000, np.array(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--dim", type=int, default=EMBED_DIM)
+    parser.add_argument("--types", nargs="+", default=list(faiss_index.INDEX_TYPES))
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=1000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        queries = next(corpus_chunks(args.queries, args.dim, args.clusters, seed=2))
+        truth = None
+
+        for index_type in ["Flat"] + [t for t in args.types if t != "Flat"]:
+            built = build(index_type, size, args.dim, args.clusters)
+            if built is None:
+                print(f"n={size:<9} {index_type:<8} skipped (not enough vectors to train)")
+                continue
+
+            index, build_seconds = built
+            timings, ids = latencies(index, queries, args.k)
+            if truth is None:
+                truth = ids
+
+            recall = np.mean([
+                len(set(found) & set(expected)) / args.k
+                for found, expected in zip(ids, truth)
+            ])
+            print(
+                f"n={size:<9} {index_type:<8} recall@{args.k} {recall:.3f}   "
+                f"p50 {np.percentile(timings, 50):8.3f} ms   "
+                f"p99 {np.percentile(timings, 99):8.3f} ms   "
+                f"build {build_seconds:7.1f} s"
+            )
+            del index
+
+
+if __name__ == "__main__":
+    main()
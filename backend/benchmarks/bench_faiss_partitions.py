@@ -0,0 +1,88 @@
+"""
+Global top_k*5 over-fetch vs per-user partitions, scaling users and
+messages per user.
+
+    cd backend
+    python -m benchmarks.bench_faiss_partitions --users 10 100 1000 --messages 200
+
+For each corpus size this reports mean query latency and the average
+number of results returned (out of top_k) for both strategies.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("FAISS_DIR", tempfile.mkdtemp(prefix="bench_faiss_"))
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+
+from services import vector_service  # noqa: E402
+
+
+def global_overfetch(index, user_ids, user_id, query, top_k):
+    """The previous search_similar strategy."""
+    _, ids = index.search(query, top_k * 5)
+    results = []
+    for row in ids[0]:
+        if row == -1 or user_ids[row] != user_id:
+            continue
+        results.append(row)
+        if len(results) == top_k:
+            break
+    return results
+
+
+def bench(users: int, messages: int, queries: int, top_k: int, dim: int):
+    rng = np.random.default_rng(0)
+    total = users * messages
+
+    vectors = rng.random((total, dim), dtype="float32")
+    user_ids = np.repeat(np.arange(users), messages)
+
+    global_index = faiss.IndexFlatL2(dim)
+    global_index.add(vectors)
+
+    vector_service.USER_INDEXES.clear()
+    vector_service.EMBED_DIM = dim
+    for user_id in range(users):
+        rows = np.flatnonzero(user_ids == user_id)
+        vector_service._add_to_partition(user_id, rows, vectors[rows])
+
+    query_users = rng.integers(0, users, size=queries)
+    query_vectors = rng.random((queries, dim), dtype="float32")
+
+    for name, search in (
+        ("global top_k*5", lambda u, q: global_overfetch(global_index, user_ids, u, q, top_k)),
+        ("per-user", lambda u, q: vector_service.search_partition(u, q, top_k)),
+    ):
+        found = 0
+        start = time.perf_counter()
+        for user_id, query in zip(query_users, query_vectors):
+            found += len(search(int(user_id), query.reshape(1, -1)))
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"users={users:<6} msgs/user={messages:<5} total={total:<8} {name:<15} "
+            f"{elapsed / queries * 1000:8.3f} ms/query   "
+            f"avg results {found / queries:.2f}/{top_k}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=vector_service.EMBED_DIM)
+    args = parser.parse_args()
+
+    for users in args.users:
+        bench(users, args.messages, args.queries, args.top_k, args.dim)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memory footprint and recall of the FAISS_STORAGE modes on a synthetic
+clustered corpus, with and without the exact re-ranking step.
+
+    cd backend
+    python -m benchmarks.bench_faiss_quantization --size 50000
+    python -m benchmarks.bench_faiss_quantization --index-type HNSW
+
+Index size is the serialized size (what the partition costs in RAM);
+the exact float32 vectors used for re-ranking stay on disk (memmap).
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.bench_faiss_index_types import EMBED_DIM, corpus_chunks
+from services import faiss_index
+
+
+def recall(found: np.ndarray, truth: np.ndarray, k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=EMBED_DIM)
+    parser.add_argument("--index-type", choices=faiss_index.INDEX_TYPES, default="Flat")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=500)
+    args = parser.parse_args()
+
+    vectors = np.vstack(list(corpus_chunks(args.size, args.dim, args.clusters)))
+    queries = next(corpus_chunks(args.queries, args.dim, args.clusters, seed=2))
+    ids = np.arange(args.size)
+
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+    baseline_bytes = None
+
+    for storage in faiss_index.STORAGE_TYPES:
+        start = time.perf_counter()
+        index = faiss_index.build_index(vectors, ids, args.index_type, storage)
+        build_seconds = time.perf_counter() - start
+
+        size_bytes = len(faiss.serialize_index(index))
+        baseline_bytes = baseline_bytes or size_bytes
+
+        _, approx = index.search(queries, args.k)
+
+        _, candidates = index.search(queries, args.k * faiss_index.FAISS_RERANK_FACTOR)
+        reranked = []
+        for query, rows in zip(queries, candidates):
+            rows = rows[rows != -1]
+            distances = ((vectors[rows] - query) ** 2).sum(axis=1)
+            reranked.append(rows[np.argsort(distances)[:args.k]])
+
+        print(
+            f"{faiss_index.index_type_of(index)}/{faiss_index.storage_of(index):<8} "
+            f"{size_bytes / 2 ** 20:8.1f} MiB ({baseline_bytes / size_bytes:4.1f}x smaller)   "
+            f"recall@{args.k} {recall(approx, truth, args.k):.3f}   "
+            f"re-ranked x{faiss_index.FAISS_RERANK_FACTOR} {recall(reranked, truth, args.k):.3f}   "
+            f"build {build_seconds:5.1f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Per-call overhead of a fresh httpx.AsyncClient versus the shared pooled
+client from services.http_client, against a local stub server.
+
+    cd backend
+    python -m benchmarks.bench_http_client --calls 500
+
+The stub speaks plain HTTP, so this measures client construction (which
+loads the CA bundle and builds an SSL context every time) plus the TCP
+handshake; against openrouter.ai each fresh client also pays a full TLS
+handshake on top.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.stub_server import start_stub_server
+from services.http_client import close_http_client, get_http_client
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+
+async def per_call_client(url: str, calls: int) -> list:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json=PAYLOAD, timeout=30)
+            response.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def shared_client(url: str, calls: int) -> list:
+    client = get_http_client()
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = await client.post(url, json=PAYLOAD, timeout=30)
+        response.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    await close_http_client()
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    mean = statistics.fmean(timings) * 1000
+    print(f"{name:<18} mean {mean:7.3f} ms   p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    return mean
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    url = f"{base_url}/chat/completions"
+
+    try:
+        # warm-up so imports / first-connection costs are not counted
+        await per_call_client(url, 5)
+        await shared_client(url, 5)
+
+        fresh = report("client per call", await per_call_client(url, args.calls))
+        shared = report("shared client", await shared_client(url, args.calls))
+        print(f"saved per call     {fresh - shared:7.3f} ms ({fresh / shared:.1f}x)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Login (bcrypt verify) throughput versus password pool size, and how
+responsive the event loop stays meanwhile.
+
+    cd backend
+    python -m benchmarks.bench_password_pool --logins 200 --concurrency 64 --workers 1 2 4 8
+
+"threadpool" is the old path: verify_password inline in a sync route,
+i.e. on AnyIO's worker threads (bcrypt releases the GIL, so this also
+scales with cores, but it holds threads every other sync route needs).
+"pool=N" goes through password_service with N worker processes.
+Loop lag is the worst delay seen by a 10 ms ticker during the run.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from services import password_service
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(verify, hashed: str, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+
+    async def login():
+        async with semaphore:
+            assert await verify("correct horse", hashed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick
+    return logins / elapsed, max(lags, default=0.0)
+
+
+async def bench_threadpool(hashed, logins, concurrency):
+    async def verify(plain, hashed):
+        return await run_in_threadpool(password_service.verify_password, plain, hashed)
+    return await run(verify, hashed, logins, concurrency)
+
+
+async def bench_pool(workers, hashed, logins, concurrency):
+    password_service.init_password_pool(workers)
+    # first job per worker pays process start-up
+    await asyncio.gather(*(
+        password_service.verify_password_async("warm up", hashed) for _ in range(workers)
+    ))
+    try:
+        return await run(password_service.verify_password_async, hashed, logins, concurrency)
+    finally:
+        password_service.close_password_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    hashed = password_service.hash_password("correct horse")
+    print(f"cores: {os.cpu_count()}  logins: {args.logins}  concurrency: {args.concurrency}\n")
+    print(f"{'mode':<12} {'logins/s':>10} {'max loop lag':>14}")
+
+    rate, lag = asyncio.run(bench_threadpool(hashed, args.logins, args.concurrency))
+    print(f"{'threadpool':<12} {rate:>10.1f} {lag * 1000:>11.1f} ms")
+
+    for workers in sorted(set(args.workers)):
+        rate, lag = asyncio.run(bench_pool(workers, hashed, args.logins, args.concurrency))
+        print(f"{f'pool={workers}':<12} {rate:>10.1f} {lag * 1000:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
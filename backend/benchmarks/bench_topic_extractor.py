@@ -0,0 +1,153 @@
+"""
+In-process keyphrase topics vs reference topics on a fixture corpus.
+
+    cd backend
+    python -m benchmarks.bench_topic_extractor
+    python -m benchmarks.bench_topic_extractor --min-confidence 0.3 0.5 0.7 --repeat 200
+    python -m benchmarks.bench_topic_extractor --record   # label with the live LLM
+
+fixtures/topic_corpus.jsonl holds user messages with hand-labelled
+topics ("hand_topics", written in extract_topics_llm's format, not model
+output). --record adds "llm_topics" from the configured model (needs
+OPENROUTER_API_KEY); scoring uses them once every message has them, or
+pick with --labels.
+
+Messages are fed in round-robin user order, as live traffic would build
+each user's vocabulary. Scores compare content-word sets: precision =
+share of the local words found in the reference, recall = share of the
+reference words found locally, both micro-averaged. Per threshold they
+are reported for the messages kept local and for the ones that would be
+escalated; gating helps if the kept ones score clearly higher.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from itertools import zip_longest
+
+from services.keyphrase_extractor import WORD, STOPWORDS, KeyphraseExtractor, _normalize
+from services.topic_service import TOPIC_LOCAL_WARMUP_DOCS, TOPIC_LOCAL_PRIOR_DOCS
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "topic_corpus.jsonl")
+
+
+def load_corpus(path: str) -> list:
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(row["user_id"], []).append(row)
+
+    # Interleave users
+    return [row for group in zip_longest(*by_user.values()) for row in group if row]
+
+
+def content_words(topics: list) -> set:
+    return {
+        _normalize(word)
+        for topic in topics
+        for word in WORD.findall(topic)
+        if word.lower() not in STOPWORDS
+    }
+
+
+def overlap(local: list, reference: list):
+    """(shared, local, reference) content-word counts."""
+    a, b = content_words(local), content_words(reference)
+    return len(a & b), len(a), len(b)
+
+
+def scores(rows: list):
+    shared = sum(r[0] for r in rows)
+    local = sum(r[1] for r in rows)
+    reference = sum(r[2] for r in rows)
+    precision = shared / local if local else 0.0
+    recall = shared / reference if reference else 0.0
+    return precision, recall
+
+
+def bench_throughput(corpus: list, repeat: int) -> float:
+    extractor = KeyphraseExtractor()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in corpus:
+            extractor.extract(row["user_id"], row["text"])
+    return len(corpus) * repeat / (time.perf_counter() - start)
+
+
+def bench_quality(corpus: list, thresholds: list, labels: str):
+    extractor = KeyphraseExtractor(
+        warmup_docs=TOPIC_LOCAL_WARMUP_DOCS,
+        prior_docs=TOPIC_LOCAL_PRIOR_DOCS
+    )
+    results = []
+    for row in corpus:
+        topics, confidence = extractor.extract(row["user_id"], row["text"])
+        results.append((confidence, *overlap(topics, row[labels])))
+
+    print(f"reference: {labels}\n")
+    print(f"{'min conf':>8} {'local':>6} {'P local':>8} {'R local':>8} {'P escalated':>12} {'R escalated':>12}")
+    for threshold in thresholds:
+        kept = [r[1:] for r in results if r[0] >= threshold]
+        escalated = [r[1:] for r in results if r[0] < threshold]
+        share = len(kept) / len(results)
+        p_kept, r_kept = scores(kept)
+        p_esc, r_esc = scores(escalated)
+        print(
+            f"{threshold:>8.2f} {share:>6.0%} {p_kept:>8.2f} {r_kept:>8.2f}"
+            + (f" {p_esc:>12.2f} {r_esc:>12.2f}" if escalated else f" {'-':>12} {'-':>12}")
+        )
+
+    precision, recall = scores([r[1:] for r in results])
+    print(f"\nlocal for every message: precision {precision:.2f}, recall {recall:.2f}")
+
+
+async def record(path: str):
+    from services.http_client import init_http_client, close_http_client
+    from services.topic_service import extract_topics_llm
+
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    init_http_client()
+    try:
+        for row in rows:
+            row["llm_topics"] = await extract_topics_llm(row["text"]) or []
+    finally:
+        await close_http_client()
+
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    print(f"Recorded llm_topics for {len(rows)} messages")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--min-confidence", type=float, nargs="+", default=[0.0, 0.3, 0.5, 0.7])
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--labels", choices=["hand_topics", "llm_topics"])
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.corpus))
+
+    corpus = load_corpus(args.corpus)
+    print(f"corpus: {len(corpus)} messages, {len({r['user_id'] for r in corpus})} users\n")
+
+    rate = bench_throughput(corpus, args.repeat)
+    print(f"local extraction: {rate:,.0f} msgs/s ({1e6 / rate:.0f} µs/msg)\n")
+
+    labels = args.labels or (
+        "llm_topics" if all("llm_topics" in row for row in corpus) else "hand_topics"
+    )
+    bench_quality(corpus, args.min_confidence, labels)
+
+
+if __name__ == "__main__":
+    main()
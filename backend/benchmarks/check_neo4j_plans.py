@@ -0,0 +1,226 @@
+"""
+PROFILE the hot chat_service lookups against a running Neo4j and check
+that they seek the index they were written for rather than scanning.
+
+    cd backend
+    python -m benchmarks.check_neo4j_plans
+
+Uses NEO4J_URI/NEO4J_USER/NEO4J_PASSWORD from the environment and
+applies the schema first. The chat_service functions themselves are
+called, with their session swapped for one that runs each query with
+PROFILE in a transaction it rolls back (writes are profiled, not kept),
+so the plans are those of the query strings the app runs. Real ids are
+used when the database has data (so db hits are meaningful); the plans
+are checked either way. Exits non-zero if a query misses its index,
+scans a label, or sorts its whole input.
+"""
+
+import sys
+from contextlib import contextmanager
+
+from neo4j_db import ensure_neo4j_schema, get_neo4j_session, close_neo4j
+from services import chat_service
+
+SCANS = {"AllNodesScan", "NodeByLabelScan"}
+
+# Sorting everything the seek returned; PartialSort / PartialTop (ties of
+# an index-provided order) are fine
+FULL_SORTS = {"Sort", "Top"}
+
+SEEKS = {"NodeIndexSeek", "NodeUniqueIndexSeek", "NodeIndexSeekByRange", "NodeUniqueIndexSeekByRange"}
+
+# (name, call, indexes the plan may seek (any one), whether the order
+# must come from the index)
+CHECKS = [
+    (
+        "chat summary (User -> ChatSession)",
+        lambda p: chat_service.get_chat_summary(p["chat_id"], p["user_id"]),
+        (":ChatSession(chat_id)", ":User(user_id)"),
+        False
+    ),
+    (
+        "prompt tail (NEXT walk from LAST_MESSAGE)",
+        lambda p: chat_service.get_recent_history(p["chat_id"], p["user_id"]),
+        (":ChatSession(chat_id)", ":User(user_id)"),
+        False
+    ),
+    (
+        "history page (latest)",
+        lambda p: chat_service.get_chat_history_page(p["chat_id"], p["user_id"], limit=50),
+        (":Message(chat_id, sequence)",),
+        True
+    ),
+    (
+        "history page (before cursor)",
+        lambda p: chat_service.get_chat_history_page(
+            p["chat_id"], p["user_id"], before=p["sequence"], limit=50
+        ),
+        (":Message(chat_id, sequence)",),
+        True
+    ),
+    (
+        "history page (after cursor)",
+        lambda p: chat_service.get_chat_history_page(p["chat_id"], p["user_id"], after=0, limit=50),
+        (":Message(chat_id, sequence)",),
+        True
+    ),
+    (
+        "summary range",
+        lambda p: chat_service.get_messages_in_range(p["chat_id"], p["user_id"], 0, p["sequence"]),
+        (":Message(chat_id, sequence)",),
+        True
+    ),
+    (
+        "first user messages (title)",
+        lambda p: chat_service.get_first_user_messages(p["chat_id"], p["user_id"]),
+        (":Message(chat_id, sequence)",),
+        True
+    ),
+    (
+        "topic links (write, rolled back)",
+        lambda p: chat_service.link_topics([{
+            "chat_id": p["chat_id"], "user_id": p["user_id"],
+            "sequence": p["sequence"], "topic": p["topic"]
+        }]),
+        (":Message(chat_id, sequence)",),
+        False
+    ),
+    (
+        "session listing (first page)",
+        lambda p: chat_service.get_user_chat_sessions(p["user_id"], limit=30),
+        (":ChatSession(user_id, last_message_at)",),
+        True
+    ),
+    (
+        "session listing (cursor)",
+        lambda p: chat_service.get_user_chat_sessions(p["user_id"], cursor=p["cursor"], limit=30),
+        (":ChatSession(user_id, last_message_at)",),
+        True
+    ),
+    (
+        "top topics (by message_count)",
+        lambda p: chat_service.get_user_topics(p["user_id"]),
+        (":Topic(user_id, message_count)",),
+        False
+    ),
+    (
+        "chats for a topic",
+        lambda p: chat_service.get_topic_chats(p["user_id"], p["topic"]),
+        (":Topic(name, user_id)",),
+        False
+    ),
+]
+
+
+class _Replay:
+    """The consumed records of a profiled query, for .single() / iteration."""
+
+    def __init__(self, records: list):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+
+class ProfilingSession:
+    def __init__(self, session, plans: list):
+        self._session = session
+        self._plans = plans
+
+    def run(self, query, **params):
+        tx = self._session.begin_transaction()
+        try:
+            result = tx.run("PROFILE " + query, **params)
+            records = list(result)
+            self._plans.append(result.consume().profile)
+        finally:
+            tx.rollback()
+        return _Replay(records)
+
+
+@contextmanager
+def profiled(plans: list):
+    with get_neo4j_session() as session:
+        yield ProfilingSession(session, plans)
+
+
+def sample_params(session) -> dict:
+    record = session.run("""
+    MATCH (u:User)-[:HAS_CHAT]->(c:ChatSession)-[:LAST_MESSAGE]->(m:Message)
+    OPTIONAL MATCH (t:Topic {user_id: u.user_id})
+    RETURN u.user_id AS user_id, c.chat_id AS chat_id, c.last_message_at AS last_at,
+           m.sequence AS sequence, t.name AS topic
+    LIMIT 1
+    """).single()
+
+    params = {
+        "user_id": 1,
+        "chat_id": "00000000-0000-0000-0000-000000000000",
+        "sequence": 1,
+        "topic": "missing",
+        "last_at": None
+    }
+    if record is not None:
+        params.update({k: v for k, v in record.items() if v is not None})
+
+    last_at = params.pop("last_at") or "9999-12-31 00:00:00"
+    params["cursor"] = f"{last_at}|{params['chat_id']}"
+    return params
+
+
+def walk(plan: dict):
+    yield plan
+    for child in plan.get("children", []):
+        yield from walk(child)
+
+
+def operator_name(plan: dict) -> str:
+    # 5.x reports e.g. "NodeUniqueIndexSeek@neo4j"
+    return plan["operatorType"].split("@")[0]
+
+
+def seeks_index(plan: dict, indexes: tuple) -> bool:
+    details = plan.get("args", {}).get("Details", "")
+    return operator_name(plan) in SEEKS and any(index in details for index in indexes)
+
+
+def main() -> int:
+    ensure_neo4j_schema()
+    failures = 0
+
+    with get_neo4j_session() as session:
+        params = sample_params(session)
+    print(f"params: {params}\n")
+
+    for name, call, indexes, ordered in CHECKS:
+        plans = []
+        chat_service.get_neo4j_session = lambda: profiled(plans)
+        call(params)
+
+        for plan in plans:
+            nodes = list(walk(plan))
+            operators = [operator_name(node) for node in nodes]
+            db_hits = sum(node.get("dbHits", 0) for node in nodes)
+
+            problems = []
+            if not any(seeks_index(node, indexes) for node in nodes):
+                problems.append(f"no seek on {' or '.join(indexes)}")
+            if SCANS.intersection(operators):
+                problems.append("label scan")
+            if ordered and FULL_SORTS.intersection(operators):
+                problems.append("sorts its whole input")
+            failures += bool(problems)
+
+            print(f"{'FAIL' if problems else 'OK  '} {name}" + (f": {', '.join(problems)}" if problems else ""))
+            print(f"     db hits: {db_hits}")
+            print(f"     plan:    {' <- '.join(operators)}\n")
+
+    close_neo4j()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
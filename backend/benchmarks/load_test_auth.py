@@ -0,0 +1,125 @@
+"""
+Load test for the auth routes on the async engine, with a throwaway
+SQLite database (aiosqlite) standing in for MySQL.
+
+    cd backend
+    python -m benchmarks.load_test_auth --users 200 --requests 2000 --concurrency 100
+
+Runs the real /auth router in-process over ASGI: registers --users users,
+logs each one in, then fires --requests authenticated GET /auth/me calls.
+/auth/me is run twice: first with every lookup going to the database
+(user cache emptied, TTL 0), then with the user cache (normal).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Never point a load test at the configured database
+_db_dir = tempfile.mkdtemp(prefix="load_auth_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/auth.db"
+os.environ.setdefault("SECRET_KEY", "load-test")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import models  # noqa: E402,F401
+from database import engine, create_tables, DB_POOL_SIZE, DB_MAX_OVERFLOW  # noqa: E402
+from routes import user  # noqa: E402
+from services import password_service  # noqa: E402
+from services.cache_service import AUTH_USER_CACHE  # noqa: E402
+
+app = FastAPI()
+app.include_router(user.router)
+
+
+async def run(requests: list, concurrency: int):
+    """requests: list of coroutine factories. Returns (req/s, latencies)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(make_request):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request()
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(r) for r in requests))
+    return len(requests) / (time.perf_counter() - start), latencies
+
+
+def report(name: str, rate: float, latencies: list):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:<22} {rate:>9.1f} req/s   p50 {p50:>7.1f} ms   p99 {p99:>7.1f} ms")
+
+
+async def main(args):
+    await create_tables()
+    password_service.init_password_pool()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        names = [f"user{i}" for i in range(args.users)]
+
+        rate, latencies = await run([
+            lambda n=n: client.post("/auth/register", json={
+                "username": n, "email": f"{n}@example.com", "password": "load-test"
+            })
+            for n in names
+        ], args.concurrency)
+        report("POST /auth/register", rate, latencies)
+
+        tokens = []
+
+        async def login(n):
+            response = await client.post("/auth/login", json={"username": n, "password": "load-test"})
+            tokens.append(response.json()["access_token"])
+            return response
+
+        rate, latencies = await run([lambda n=n: login(n) for n in names], args.concurrency)
+        report("POST /auth/login", rate, latencies)
+
+        me_requests = [
+            lambda t=tokens[i % len(tokens)]: client.get(
+                "/auth/me", headers={"Authorization": f"Bearer {t}"}
+            )
+            for i in range(args.requests)
+        ]
+
+        # TTL 0 only affects new entries: drop the ones register / login
+        # already cached, or the "db" pass is all cache hits
+        ttl = AUTH_USER_CACHE.ttl
+        AUTH_USER_CACHE.ttl = 0
+        for n in names:
+            AUTH_USER_CACHE.invalidate(n)
+        hits = AUTH_USER_CACHE.stats["hits"]
+        rate, latencies = await run(me_requests, args.concurrency)
+        report("GET /auth/me (db)", rate, latencies)
+        assert AUTH_USER_CACHE.stats["hits"] == hits, "db pass was served from the cache"
+
+        AUTH_USER_CACHE.ttl = ttl
+        rate, latencies = await run(me_requests, args.concurrency)
+        report("GET /auth/me (cached)", rate, latencies)
+
+    password_service.close_password_pool()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"sqlite: {os.environ['DATABASE_URL']}")
+    print(f"pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} concurrency={args.concurrency}\n")
+    asyncio.run(main(args))
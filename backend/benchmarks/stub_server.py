@@ -0,0 +1,70 @@
+"""
+Minimal OpenRouter-compatible stub for the benchmarks.
+
+Serves /chat/completions and /embeddings over HTTP/1.1 with keep-alive,
+optionally sleeping `latency` seconds per request to mimic upstream time.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBED_DIM = 1536
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    request_count = 0
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        with StubHandler._lock:
+            StubHandler.request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path.endswith("/embeddings"):
+            inputs = body.get("input")
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            data = [
+                {"index": i, "embedding": [float(len(text) % 7)] * EMBED_DIM}
+                for i, text in enumerate(inputs)
+            ]
+            payload = {"data": data}
+        else:
+            payload = {"choices": [{"message": {"content": "ok"}}]}
+
+        raw = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def start_stub_server(latency: float = 0.0):
+    """
+    Start the stub on a free port in a daemon thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    handler = type("Handler", (StubHandler,), {"latency": latency})
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 1024})
+    server = server_class(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
@@ -1,5 +1,13 @@
-from database import engine
-from models import Base
+import asyncio
 
-Base.metadata.create_all(bind=engine)
+from database import engine, create_tables
+import models  # noqa: F401 (registers the tables on Base)
+
+
+async def main():
+    await create_tables()
+    await engine.dispose()
+
+
+asyncio.run(main())
 print("✅ Tables created successfully")
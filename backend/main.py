@@ -37,14 +37,39 @@
 # def root():
 #     return {"status": "Chat App Backend Running"}
 
+import asyncio
+import os
+
+# The job worker (worker.py) is the vector store's writer; the web app
+# only searches and tails its log
+os.environ.setdefault("VECTOR_STORE_ROLE", "reader")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routes import user, chat
+from routes import user, chat, topic
 
 # 🔴 ADD THESE IMPORTS
-from database import engine, Base
+from database import engine, create_tables
 import models  # VERY IMPORTANT (loads User model)
+from services.http_client import init_http_client, close_http_client
+from services.vector_service import (
+    IS_WRITER,
+    run_vector_snapshots,
+    run_vector_refresh,
+    close_vector_store,
+    EMBED_CACHE_STATS,
+    embedding_batcher
+)
+from services.cache_service import cache_stats, run_cache_events
+from services.password_service import init_password_pool, close_password_pool, password_pool_stats
+from services.job_queue import job_queue_stats
+from neo4j_db import ensure_neo4j_schema, close_neo4j
+from services.chat_service import (
+    backfill_session_counters,
+    backfill_message_chat_ids,
+    backfill_topic_counters
+)
 
 print(">>> Starting FastAPI app")
 
@@ -63,14 +88,52 @@ app.add_middleware(
 
 app.include_router(user.router)
 app.include_router(chat.router)
+app.include_router(topic.router)
 print(">>> Routers loaded")
 
 # 🔴 ADD THIS BLOCK
 @app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
+async def on_startup():
+    await create_tables()
     print("✅ Database tables ensured")
+    if ensure_neo4j_schema():
+        backfill_session_counters()
+        backfill_message_chat_ids()
+        backfill_topic_counters()
+    init_http_client()
+    init_password_pool()
+
+@app.on_event("startup")
+async def start_background_loops():
+    app.state.vector_snapshots = asyncio.create_task(
+        run_vector_snapshots() if IS_WRITER else run_vector_refresh()
+    )
+    app.state.cache_events = asyncio.create_task(run_cache_events())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.vector_snapshots.cancel()
+    app.state.cache_events.cancel()
+    await asyncio.to_thread(close_vector_store)
+    await asyncio.to_thread(close_neo4j)
+    await close_http_client()
+    close_password_pool()
+    await engine.dispose()
 
 @app.get("/")
 def root():
     return {"status": "Chat App Backend Running"}
+
+# Per-process counters (each worker reports its own); the job queue is
+# shared, so its depth / lag is the same from every process
+@app.get("/metrics")
+async def metrics():
+    return {
+        "jobs": await job_queue_stats(),
+        "caches": cache_stats(),
+        "password_pool": password_pool_stats(),
+        "embeddings": {
+            "cache": EMBED_CACHE_STATS,
+            "batcher": embedding_batcher.stats
+        }
+    }
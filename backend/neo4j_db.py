@@ -1,5 +1,9 @@
 from neo4j import GraphDatabase
+from neo4j.exceptions import ServiceUnavailable
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
 import os
 
 load_dotenv()
@@ -8,10 +12,86 @@ NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
+# Threads used by async code for Neo4j calls; also caps driver connections
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "16"))
+
 driver = GraphDatabase.driver(
     NEO4J_URI,
-    auth=(NEO4J_USER, NEO4J_PASSWORD)
+    auth=(NEO4J_USER, NEO4J_PASSWORD),
+    max_connection_pool_size=NEO4J_POOL_SIZE
 )
 
 def get_neo4j_session():
     return driver.session()
+
+
+# ---------------- SCHEMA ----------------
+
+# Idempotent; applied on every startup. chat_service queries start from
+# User.user_id / ChatSession.chat_id or Message(chat_id, sequence), and
+# topic linking MERGEs on Topic(name, user_id).
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT user_id_unique IF NOT EXISTS "
+    "FOR (u:User) REQUIRE u.user_id IS UNIQUE",
+
+    "CREATE CONSTRAINT chat_id_unique IF NOT EXISTS "
+    "FOR (c:ChatSession) REQUIRE c.chat_id IS UNIQUE",
+
+    "CREATE INDEX topic_name_user IF NOT EXISTS "
+    "FOR (t:Topic) ON (t.name, t.user_id)",
+
+    # Topic listing: a user's topics by maintained message_count
+    "CREATE INDEX topic_user_count IF NOT EXISTS "
+    "FOR (t:Topic) ON (t.user_id, t.message_count)",
+
+    # Messages of one chat by sequence (history pages, summary ranges,
+    # topic links). Replaces a global Message(sequence) index, which
+    # every chat's 1..n made useless
+    "DROP INDEX message_sequence IF EXISTS",
+
+    "CREATE INDEX message_chat_sequence IF NOT EXISTS "
+    "FOR (m:Message) ON (m.chat_id, m.sequence)",
+
+    # Sidebar listing: a user's chats ordered by last activity
+    "CREATE INDEX chat_user_activity IF NOT EXISTS "
+    "FOR (c:ChatSession) ON (c.user_id, c.last_message_at)",
+]
+
+
+def ensure_neo4j_schema() -> bool:
+    try:
+        with get_neo4j_session() as session:
+            for statement in SCHEMA_STATEMENTS:
+                session.run(statement).consume()
+    except ServiceUnavailable:
+        # Neo4j may still be booting (compose only waits for the container);
+        # the schema is applied on the next start
+        print("⚠️ Neo4j unavailable, schema not ensured")
+        return False
+
+    print("✅ Neo4j constraints and indexes ensured")
+    return True
+
+
+# ---------------- ASYNC OFFLOAD ----------------
+
+_executor = ThreadPoolExecutor(max_workers=NEO4J_POOL_SIZE, thread_name_prefix="neo4j")
+
+
+async def run_neo4j(fn, *args, **kwargs):
+    """Run a blocking Neo4j helper on the bounded pool, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def neo4j_async(fn):
+    """Async twin of a sync chat_service function (same query, same args)."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_neo4j(fn, *args, **kwargs)
+    return wrapper
+
+
+def close_neo4j():
+    _executor.shutdown(wait=True)
+    driver.close()
@@ -0,0 +1,34 @@
+"""
+Rebuild the per-user FAISS partitions with a different index type
+and/or storage mode, training IVF centroids and quantizers from the
+exact vectors already stored.
+
+Stop the backend first, then:
+
+    python rebuild_index.py                 # uses FAISS_INDEX_TYPE
+    python rebuild_index.py --type IVFFlat
+    python rebuild_index.py --type HNSW --storage SQ8
+
+Partitions with too few vectors to train stay Flat; rerun later as they grow.
+"""
+
+import argparse
+from collections import Counter
+
+from services.faiss_index import FAISS_INDEX_TYPE, FAISS_STORAGE, INDEX_TYPES, STORAGE_TYPES
+from services.vector_service import close_vector_store, rebuild_partitions
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--type", choices=INDEX_TYPES, default=FAISS_INDEX_TYPE)
+parser.add_argument("--storage", choices=STORAGE_TYPES, default=FAISS_STORAGE)
+args = parser.parse_args()
+
+built = rebuild_partitions(args.type, args.storage)
+close_vector_store()
+
+counts = Counter(index_type for index_type, _ in built.values())
+vectors = sum(count for _, count in built.values())
+
+print(f"✅ Rebuilt {len(built)} partitions ({vectors} vectors) as {args.type}/{args.storage}")
+for index_type, count in sorted(counts.items()):
+    print(f"   {index_type}: {count} partitions")
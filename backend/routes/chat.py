@@ -1,26 +1,37 @@
 
-from fastapi import APIRouter, Depends
-from fastapi import BackgroundTasks
-from auth import get_current_user
+import asyncio
+import json
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from auth import get_current_user_id
 from schemas import ChatMessage
 from services.chat_service import (
     create_chat_session,
-    store_message,
-    get_chat_history
+    store_exchange_async,
+    get_chat_history_page,
+    get_recent_history_async
+)
+from services.llm_service import (
+    get_ai_response_with_context,
+    stream_ai_response_with_context
 )
-from services.llm_service import get_ai_response_with_context
 # from services.topic_service import extract_topics
-from services.chat_service import link_message_to_topics
-from services.vector_service import store_embedding, search_similar
+from services.vector_service import search_similar, cached_embedding, encode_vector
 # from services.title_service import generate_chat_title
-from services.chat_service import update_chat_title_if_empty
-from services.topic_service import extract_topics_llm
-from services.title_service import generate_title_from_messages
-from services.chat_service import get_first_user_messages
+from services.summary_service import summary_due
+from services.title_service import title_due
+from services.job_queue import enqueue_jobs
 
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+HISTORY_PAGE_SIZE = 50
+HISTORY_PAGE_MAX = 200
+SESSIONS_PAGE_SIZE = 30
+SESSIONS_PAGE_MAX = 100
+
 # async def process_message_background(
 #     chat_id: str,
 #     user_id: int,
@@ -60,59 +71,82 @@ router = APIRouter(prefix="/chat", tags=["Chat"])
 #         text=ai_text
 #     )
 
-async def process_message_background(
+def title_messages_from_history(history: list, user_seq: int, user_text: str):
+    """
+    When this message triggers the chat title: the chat's user messages
+    so far, taken from the history already loaded for the prompt. None
+    if not due, or if the history doesn't reach back (the worker then
+    reads them from the graph).
+    """
+    if not title_due(user_seq):
+        return None
+
+    earlier = {m["sequence"]: m["text"] for m in history if m["sender"] == "user"}
+    sequences = range(1, user_seq, 2)
+    if not all(sequence in earlier for sequence in sequences):
+        return None
+    return [earlier[sequence] for sequence in sequences] + [user_text]
+
+
+async def enqueue_post_message_jobs(
     chat_id: str,
     user_id: int,
     user_seq: int,
     user_text: str,
     ai_seq: int,
-    ai_text: str
+    ai_text: str,
+    title_messages: list = None
 ):
-    # 🔹 Topics (UNCHANGED)
-    topics = await extract_topics_llm(user_text)
-
-    if topics:
-        link_message_to_topics(
-            chat_id=chat_id,
-            user_id=user_id,
-            message_sequence=user_seq,
-            topics=topics
-        )
-
-    # 🔹 Generate title ONLY after 3rd user message
-        user_messages = get_first_user_messages(
-            chat_id=chat_id,
-            user_id=user_id,
-            limit=3
-        )
-        if len(user_messages) == 3:
-            title = await generate_title_from_messages(user_messages)
-            print("=======================")
-            print(title)
-            update_chat_title_if_empty(
-                chat_id=chat_id,
-                user_id=user_id,
-                title=title
-            )
+    """
+    Topics (+ title), rolling summary and embeddings run in worker.py,
+    from the durable job queue, not in this process.
+    """
+    topics_payload = {
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "user_seq": user_seq,
+        "text": user_text
+    }
+    # 🔹 Title is generated once, by the job for the 3rd user message
+    if title_messages:
+        topics_payload["title_messages"] = title_messages
+
+    user_embed_payload = {
+        "user_id": user_id,
+        "message_id": f"{chat_id}:{user_seq}",
+        "text": user_text
+    }
+    # 🔹 search_similar already embedded the user message: hand the
+    # vector over instead of embedding it again in the worker
+    user_vector = cached_embedding(user_text)
+    if user_vector is not None:
+        user_embed_payload["vector"] = encode_vector(user_vector)
+
+    jobs = [
+        ("topics", topics_payload),
+        ("embed", user_embed_payload),
+        ("embed", {
+            "user_id": user_id,
+            "message_id": f"{chat_id}:{ai_seq}",
+            "text": ai_text
+        })
+    ]
 
-    # 🔹 Embeddings (UNCHANGED)
-    await store_embedding(
-        user_id=user_id,
-        message_id=f"{chat_id}:{user_seq}",
-        text=user_text
-    )
+    # 🔹 Rolling summary, refreshed every SUMMARY_EVERY messages
+    if summary_due(user_seq, ai_seq):
+        jobs.append(("summary", {
+            "chat_id": chat_id,
+            "user_id": user_id,
+            "ai_seq": ai_seq
+        }))
 
-    await store_embedding(
-        user_id=user_id,
-        message_id=f"{chat_id}:{ai_seq}",
-        text=ai_text
-    )
+    await enqueue_jobs(jobs)
 
 
 # 🔹 STEP 3: Start a new chat session
 @router.post("/start")
-def start_chat(current_user = Depends(get_current_user)):
-    chat_id = create_chat_session(current_user.id)
+def start_chat(user_id: int = Depends(get_current_user_id)):
+    chat_id = create_chat_session(user_id)
     return {
         "chat_id": chat_id
     }
@@ -122,7 +156,8 @@ def start_chat(current_user = Depends(get_current_user)):
 def build_llm_messages(
     history: list,
     new_message: str,
-    semantic_memory: list
+    semantic_memory: list,
+    summary: str = None
 ):
     messages = [
         {
@@ -144,6 +179,13 @@ def build_llm_messages(
             )
         })
 
+    # 🔹 Rolling summary of everything before the recent history
+    if summary:
+        messages.append({
+            "role": "system",
+            "content": "Summary of the earlier conversation:\n" + summary
+        })
+
     # 🔹 Add chat history (Step 2)
     for msg in history:
         messages.append({
@@ -166,44 +208,35 @@ def build_llm_messages(
 async def send_message(
     chat_id: str,
     payload: ChatMessage,
-    background_tasks: BackgroundTasks,
-    current_user = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
-    # 1️⃣ Chat history
-    history = get_chat_history(chat_id, current_user.id)
-
-    # 2️⃣ Semantic memory (API-based)
-    semantic_memory = await search_similar(
-        user_id=current_user.id,
-        query=payload.message,
-        top_k=3
+    # 1️⃣ Recent chat history (token budget) + 2️⃣ semantic memory, fetched concurrently
+    history, semantic_memory = await asyncio.gather(
+        get_recent_history_async(chat_id, user_id),
+        search_similar(
+            user_id=user_id,
+            query=payload.message,
+            top_k=3
+        )
     )
 
     # 3️⃣ Build LLM prompt
     llm_messages = build_llm_messages(
-        history=history,
+        history=history["messages"],
         new_message=payload.message,
-        semantic_memory=semantic_memory
+        semantic_memory=semantic_memory,
+        summary=history["summary"]
     )
 
     # 4️⃣ Call LLM
     ai_response = await get_ai_response_with_context(llm_messages)
 
-    # 5️⃣ Store USER message
-    user_seq = store_message(
+    # 5️⃣ Store USER + AI messages (one transaction)
+    user_seq, ai_seq = await store_exchange_async(
         chat_id=chat_id,
-        user_id=current_user.id,
-        sender="user",
-        text=payload.message
-    )
-
-
-    # 8️⃣ Store AI message
-    ai_seq = store_message(
-        chat_id=chat_id,
-        user_id=current_user.id,
-        sender="ai",
-        text=ai_response
+        user_id=user_id,
+        user_text=payload.message,
+        ai_text=ai_response
     )
 
     # 9️⃣ Store AI embedding
@@ -212,37 +245,155 @@ async def send_message(
     #     message_id=f"{chat_id}:{ai_seq}",
     #     text=ai_response
     # )
-    background_tasks.add_task(
-        process_message_background,
+    await enqueue_post_message_jobs(
         chat_id,
-        current_user.id,
+        user_id,
         user_seq,
         payload.message,
         ai_seq,
-        ai_response
+        ai_response,
+        title_messages=title_messages_from_history(history["messages"], user_seq, payload.message)
     )
 
     return {"reply": ai_response}
 
 
+def _sse(data: dict, event: str = None) -> str:
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+@router.post("/{chat_id}/message/stream")
+async def send_message_stream(
+    chat_id: str,
+    payload: ChatMessage,
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Streaming variant of send_message (Server-Sent Events).
+
+    Emits one `data: {"token": ...}` frame per LLM delta, then a final
+    `event: done` frame once both messages are stored.
+    """
+    history, semantic_memory = await asyncio.gather(
+        get_recent_history_async(chat_id, user_id),
+        search_similar(
+            user_id=user_id,
+            query=payload.message,
+            top_k=3
+        )
+    )
+
+    llm_messages = build_llm_messages(
+        history=history["messages"],
+        new_message=payload.message,
+        semantic_memory=semantic_memory,
+        summary=history["summary"]
+    )
+
+    async def event_stream():
+        parts = []
+        try:
+            async for token in stream_ai_response_with_context(llm_messages):
+                parts.append(token)
+                yield _sse({"token": token})
+        except httpx.HTTPError:
+            yield _sse({"detail": "LLM request failed"}, event="error")
+            return
+
+        ai_response = "".join(parts)
+
+        # The tokens are already out: a failure past this point must reach
+        # the client as an error frame, not as a closed stream
+        try:
+            user_seq, ai_seq = await store_exchange_async(
+                chat_id=chat_id,
+                user_id=user_id,
+                user_text=payload.message,
+                ai_text=ai_response
+            )
+        except Exception as e:
+            print(f"⚠️ Streamed reply not stored for chat {chat_id}: {e!r}")
+            yield _sse({"detail": "Reply could not be saved"}, event="error")
+            return
+
+        try:
+            await enqueue_post_message_jobs(
+                chat_id,
+                user_id,
+                user_seq,
+                payload.message,
+                ai_seq,
+                ai_response,
+                title_messages=title_messages_from_history(history["messages"], user_seq, payload.message)
+            )
+        except Exception as e:
+            print(f"⚠️ Post-message jobs not queued for chat {chat_id}: {e!r}")
+            yield _sse({"detail": "Reply saved, but post-processing could not be queued"}, event="error")
+            return
+
+        yield _sse({"reply": ai_response}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 
 # # 🔹 STEP 5: Fetch chat history
 @router.get("/{chat_id}/history")
 def chat_history(
     chat_id: str,
-    current_user = Depends(get_current_user)
+    before: int | None = Query(None, ge=1),
+    after: int | None = Query(None, ge=0),
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_PAGE_MAX),
+    user_id: int = Depends(get_current_user_id)
 ):
-    history = get_chat_history(chat_id, current_user.id)
+    """
+    Paginated transcript. Without a cursor returns the latest `limit`
+    messages; pass next_cursor back as `before` to load older ones.
+    """
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    page = get_chat_history_page(
+        chat_id,
+        user_id,
+        before=before,
+        after=after,
+        limit=limit
+    )
     return {
         "chat_id": chat_id,
-        "messages": history
+        "messages": page["messages"],
+        "next_cursor": page["next_cursor"]
     }
 
 @router.get("/sessions")
-def list_chat_sessions(current_user = Depends(get_current_user)):
-    from services.chat_service import get_user_chat_sessions
-
-    sessions = get_user_chat_sessions(current_user.id)
+def list_chat_sessions(
+    cursor: str | None = None,
+    limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=SESSIONS_PAGE_MAX),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Chats by last activity. Pass next_cursor back as `cursor` for the
+    next page.
+    """
+    from services.chat_service import get_user_chat_sessions, parse_sessions_cursor
+
+    if cursor is not None:
+        try:
+            parse_sessions_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    page = get_user_chat_sessions(user_id, cursor=cursor, limit=limit)
     return {
-        "sessions": sessions
+        "sessions": page["sessions"],
+        "next_cursor": page["next_cursor"]
     }
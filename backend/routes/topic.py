@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+
+from auth import get_current_user_id
+from services.chat_service import get_user_topics_async, get_topic_chats_async
+
+
+router = APIRouter(prefix="/topics", tags=["Topics"])
+
+TOPICS_PAGE_SIZE = 20
+TOPICS_PAGE_MAX = 100
+
+
+# 🔹 Most discussed topics (counters kept up to date by the worker)
+@router.get("")
+async def list_topics(
+    limit: int = Query(TOPICS_PAGE_SIZE, ge=1, le=TOPICS_PAGE_MAX),
+    user_id: int = Depends(get_current_user_id)
+):
+    topics = await get_user_topics_async(user_id, limit=limit)
+    return {"topics": topics}
+
+
+# 🔹 Chats about one topic. Name as a query param: topics contain "/"
+@router.get("/chats")
+async def topic_chats(
+    name: str = Query(..., min_length=1),
+    limit: int = Query(TOPICS_PAGE_SIZE, ge=1, le=TOPICS_PAGE_MAX),
+    user_id: int = Depends(get_current_user_id)
+):
+    chats = await get_topic_chats_async(user_id, name, limit=limit)
+    return {"topic": name, "chats": chats}
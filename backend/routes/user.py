@@ -1,46 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
 from models import User
 from schemas import UserCreate, UserLogin
-from auth import hash_password, verify_password, create_access_token,get_current_user
+from auth import (
+    hash_password_async,
+    verify_password_async,
+    create_access_token,
+    token_claims,
+    get_current_user
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def _find_user(db: AsyncSession, username: str):
+    return await db.scalar(select(User).where(User.username == username))
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.username == user.username).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await _find_user(db, user.username)
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
 
     new_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=hash_password(user.password)
+        hashed_password=await hash_password_async(user.password)
     )
     db.add(new_user)
-    db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # lost a race with a concurrent register, or the email is taken
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username or email already exists")
     return {"message": "User registered successfully"}
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
+    db_user = await _find_user(db, user.username)
 
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_access_token({"sub": db_user.username})
+    token = create_access_token(token_claims(db_user))
     return {"access_token": token, "token_type": "bearer"}
 
 @router.get("/me")
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "username": current_user.username,
@@ -49,9 +58,9 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/chat")
-def chat(
+async def chat(
     message: str,
-    current_user: User = Depends(get_current_user)
+    current_user = Depends(get_current_user)
 ):
     return {
         "user": current_user.username,
@@ -0,0 +1,175 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+from services.job_queue import JOB_QUEUE
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+# Per-process caches; with several workers each keeps its own copy, so
+# TTL bounds how stale another worker's view can get
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "1024"))
+HISTORY_CACHE_TTL = float(os.getenv("HISTORY_CACHE_TTL", "300"))
+SESSIONS_CACHE_SIZE = int(os.getenv("SESSIONS_CACHE_SIZE", "1024"))
+SESSIONS_CACHE_TTL = float(os.getenv("SESSIONS_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "4096"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_NEGATIVE_CACHE_TTL = float(os.getenv("AUTH_NEGATIVE_CACHE_TTL", "30"))
+
+# How often the web app applies invalidations published by worker.py
+# (new summaries and titles) through the job queue
+CACHE_EVENTS_INTERVAL = float(os.getenv("CACHE_EVENTS_INTERVAL", "1"))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Readers that fill the cache after a slow load take a stamp() first
+    and fill with set(..., stamp=stamp): if the key was written or
+    invalidated in between, the (possibly stale) value is dropped.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._changed = OrderedDict()  # key -> write counter at last change
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def stamp(self) -> int:
+        with self._lock:
+            return self._writes
+
+    def _touch(self, key):
+        self._writes += 1
+        self._changed[key] = self._writes
+        self._changed.move_to_end(key)
+        while len(self._changed) > self.maxsize:
+            self._changed.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.stats["misses"] += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key, value, stamp: int = None):
+        with self._lock:
+            if stamp is not None and self._changed.get(key, 0) > stamp:
+                return
+
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def update(self, key, fn):
+        """
+        Write-through: replace a cached value with fn(value). fn returns
+        None to drop the entry instead. Missing keys are left missing.
+        The entry keeps its original expiry, so a value that is only ever
+        extended in place is still reloaded at least once per TTL.
+        """
+        with self._lock:
+            self._touch(key)
+            entry = self._data.get(key)
+            if entry is None:
+                return
+
+            value = fn(entry[1])
+            if value is None:
+                del self._data[key]
+                self.stats["invalidations"] += 1
+            else:
+                self._data[key] = (entry[0], value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._touch(key)
+            if self._data.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._data),
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+            }
+
+
+# Prompt tails (get_recent_history), keyed (user_id, chat_id)
+HISTORY_CACHE = TTLCache(HISTORY_CACHE_SIZE, HISTORY_CACHE_TTL)
+
+# First sidebar page (get_user_chat_sessions), keyed user_id
+SESSIONS_CACHE = TTLCache(SESSIONS_CACHE_SIZE, SESSIONS_CACHE_TTL)
+
+# Latest history page (get_chat_history_page), keyed (user_id, chat_id)
+HISTORY_PAGE_CACHE = TTLCache(HISTORY_CACHE_SIZE, HISTORY_CACHE_TTL)
+
+
+# Authenticated users, keyed by token subject (auth.get_current_user)
+AUTH_USER_CACHE = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+# Rejected tokens (bad signature, expired, unknown user), keyed by token hash
+AUTH_NEGATIVE_CACHE = TTLCache(AUTH_CACHE_SIZE, AUTH_NEGATIVE_CACHE_TTL)
+
+
+# Caches worker.py invalidates in the web processes (cache_events table
+# of the job queue), by the names cache_stats() reports them under
+SHARED_CACHES = {
+    "chat_history": HISTORY_CACHE,
+    "chat_history_page": HISTORY_PAGE_CACHE,
+    "chat_sessions": SESSIONS_CACHE
+}
+
+
+def apply_cache_events(events: list):
+    for _, cache, key in events:
+        SHARED_CACHES[cache].invalidate(tuple(key) if isinstance(key, list) else key)
+
+
+async def run_cache_events():
+    """
+    Background loop started with the app: apply invalidations other
+    processes published since the last poll. Starts from the newest
+    event, as everything cached here was loaded after it.
+    """
+    after_id = await asyncio.to_thread(JOB_QUEUE.last_cache_event_id)
+    while True:
+        await asyncio.sleep(CACHE_EVENTS_INTERVAL)
+        try:
+            events = await asyncio.to_thread(JOB_QUEUE.cache_events_since, after_id)
+        except Exception as e:
+            print(f"⚠️ Cache events poll failed: {e!r}")
+            continue
+        if events:
+            apply_cache_events(events)
+            after_id = events[-1][0]
+
+
+def cache_stats() -> dict:
+    return {
+        "chat_history": HISTORY_CACHE.snapshot(),
+        "chat_history_page": HISTORY_PAGE_CACHE.snapshot(),
+        "chat_sessions": SESSIONS_CACHE.snapshot(),
+        "auth_users": AUTH_USER_CACHE.snapshot(),
+        "auth_rejected": AUTH_NEGATIVE_CACHE.snapshot()
+    }
@@ -1,7 +1,66 @@
-from neo4j_db import get_neo4j_session
+from neo4j_db import get_neo4j_session, neo4j_async
+from services.tokenizer import count_message_tokens
+from services.cache_service import HISTORY_CACHE, HISTORY_PAGE_CACHE, SESSIONS_CACHE
+from dotenv import load_dotenv
+import os
 import uuid
 from datetime import datetime
 
+load_dotenv()
+
+# Prompt budget for chat history, and a hard cap on how far back along
+# the NEXT chain a single request may walk
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", "50"))
+
+
+# Messages carry their chat's chat_id, so reads by sequence seek the
+# Message(chat_id, sequence) index instead of expanding every HAS_MESSAGE
+# edge of the chat. Queries that start from that index check ownership
+# with this predicate.
+_OWNS_CHAT = "EXISTS { (:User {user_id: $user_id})-[:HAS_CHAT]->(:ChatSession {chat_id: $chat_id}) }"
+
+
+# ---------------- CACHE ----------------
+# Writes below update or invalidate the cached views in cache_service so
+# hot chats are served without a graph round trip.
+
+def _fit_history(
+    summary: str,
+    messages: list,
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+    max_messages: int = HISTORY_MAX_MESSAGES
+):
+    """Newest messages (given oldest first) that fit next to the summary."""
+    used = count_message_tokens(summary) if summary else 0
+    kept = []
+
+    for message in reversed(messages[-max_messages:] if max_messages > 0 else []):
+        used += count_message_tokens(message["text"])
+        if used > token_budget:
+            break
+        kept.append(message)
+
+    kept.reverse()
+    return {
+        "summary": summary,
+        "messages": kept
+    }
+
+
+def _cache_new_messages(chat_id: str, user_id: int, new_messages: list):
+    """Write-through after a store: extend the cached prompt tail in place."""
+    def extend(cached):
+        tail = cached["messages"]
+        if tail and tail[-1]["sequence"] != new_messages[0]["sequence"] - 1:
+            # Someone else appended in between; reload next time
+            return None
+        return _fit_history(cached["summary"], tail + new_messages)
+
+    HISTORY_CACHE.update((user_id, chat_id), extend)
+    HISTORY_PAGE_CACHE.invalidate((user_id, chat_id))
+    SESSIONS_CACHE.invalidate(user_id)
+
 
 def create_chat_session(user_id: int):
     chat_id = str(uuid.uuid4())
@@ -10,7 +69,10 @@ def create_chat_session(user_id: int):
     MERGE (u:User {user_id: $user_id})
     CREATE (c:ChatSession {
         chat_id: $chat_id,
-        created_at: $created_at
+        user_id: $user_id,
+        created_at: $created_at,
+        last_message_at: $created_at,
+        message_count: 0
     })
     CREATE (u)-[:HAS_CHAT]->(c)
     """
@@ -23,62 +85,264 @@ def create_chat_session(user_id: int):
             created_at=str(datetime.utcnow())
         )
 
-    return chat_id
+    # A new chat has no history yet: its first message needs no read
+    HISTORY_CACHE.set((user_id, chat_id), {"summary": None, "messages": []})
+    SESSIONS_CACHE.invalidate(user_id)
 
+    return chat_id
 
 
-def store_message(chat_id: str, user_id: int, sender: str, text: str):
+def store_exchange(chat_id: str, user_id: int, user_text: str, ai_text: str):
+    """
+    Append a user message and the AI reply in one transaction.
+    Returns (user_sequence, ai_sequence).
+    """
     query = """
     MATCH (u:User {user_id: $user_id})-[:HAS_CHAT]->(c:ChatSession {chat_id: $chat_id})
 
     OPTIONAL MATCH (c)-[oldRel:LAST_MESSAGE]->(last:Message)
 
-    WITH c, last, oldRel, COALESCE(last.sequence, 0) + 1 AS nextSeq
+    WITH c, last, oldRel, COALESCE(last.sequence, 0) AS lastSeq
 
-    CREATE (m:Message {
-        sender: $sender,
-        text: $text,
+    CREATE (um:Message {
+        chat_id: $chat_id,
+        sender: 'user',
+        text: $user_text,
         timestamp: $timestamp,
-        sequence: nextSeq
+        sequence: lastSeq + 1
     })
+    CREATE (am:Message {
+        chat_id: $chat_id,
+        sender: 'ai',
+        text: $ai_text,
+        timestamp: $timestamp,
+        sequence: lastSeq + 2
+    })
+    CREATE (um)-[:NEXT]->(am)
 
     FOREACH (_ IN CASE WHEN last IS NOT NULL THEN [1] ELSE [] END |
-        CREATE (last)-[:NEXT]->(m)
+        CREATE (last)-[:NEXT]->(um)
     )
 
     FOREACH (_ IN CASE WHEN oldRel IS NOT NULL THEN [1] ELSE [] END |
         DELETE oldRel
     )
 
-    CREATE (c)-[:LAST_MESSAGE]->(m)
-    CREATE (c)-[:HAS_MESSAGE]->(m)
+    CREATE (c)-[:LAST_MESSAGE]->(am)
+    CREATE (c)-[:HAS_MESSAGE]->(um)
+    CREATE (c)-[:HAS_MESSAGE]->(am)
 
-    RETURN m.sequence AS sequence
+    SET c.message_count = COALESCE(c.message_count, 0) + 2,
+        c.last_message_at = $timestamp
+
+    RETURN um.sequence AS user_sequence, am.sequence AS ai_sequence
     """
 
+    timestamp = str(datetime.utcnow())
+
     with get_neo4j_session() as session:
         result = session.run(
             query,
             user_id=user_id,
             chat_id=chat_id,
-            sender=sender,
-            text=text,
-            timestamp=str(datetime.utcnow())
+            user_text=user_text,
+            ai_text=ai_text,
+            timestamp=timestamp
         )
 
         record = result.single()
-        return record["sequence"]
 
+    user_seq, ai_seq = record["user_sequence"], record["ai_sequence"]
+    _cache_new_messages(chat_id, user_id, [
+        {"sender": "user", "text": user_text, "timestamp": timestamp, "sequence": user_seq},
+        {"sender": "ai", "text": ai_text, "timestamp": timestamp, "sequence": ai_seq}
+    ])
+    return user_seq, ai_seq
+
+
+def get_chat_history_page(
+    chat_id: str,
+    user_id: int,
+    before: int = None,
+    after: int = None,
+    limit: int = 50
+):
+    """
+    One page of a chat, oldest first, keyed on Message.sequence.
+
+    `before` (or no cursor: the latest page) pages backwards, `after` pages
+    forwards. next_cursor is the sequence to pass as the same parameter
+    for the following page, or None when there are no more messages.
+    """
+    latest = before is None and after is None
+    if latest:
+        cached = HISTORY_PAGE_CACHE.get((user_id, chat_id))
+        if cached is not None and cached["limit"] == limit:
+            return cached["page"]
+        stamp = HISTORY_PAGE_CACHE.stamp()
+
+    forward = after is not None
+    if forward:
+        bound = "m.sequence > $after"
+    elif before is not None:
+        bound = "m.sequence < $before"
+    else:
+        bound = "m.sequence > 0"
+
+    # Seeks Message(chat_id, sequence) from the cursor in index order, so
+    # a page reads `limit` messages however long the chat is. One extra
+    # row tells us whether another page exists
+    query = f"""
+    MATCH (m:Message)
+    WHERE m.chat_id = $chat_id AND {bound}
+      AND {_OWNS_CHAT}
+    RETURN m
+    ORDER BY m.sequence {"ASC" if forward else "DESC"}
+    LIMIT $limit
+    """
+
+    messages = []
+
+    with get_neo4j_session() as session:
+        result = session.run(
+            query,
+            user_id=user_id,
+            chat_id=chat_id,
+            before=before,
+            after=after,
+            limit=limit + 1
+        )
+
+        for record in result:
+            m = record["m"]
+            messages.append({
+                "sender": m["sender"],
+                "text": m["text"],
+                "timestamp": m["timestamp"],
+                "sequence": m["sequence"]
+            })
+
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not forward:
+        messages.reverse()
 
+    next_cursor = None
+    if has_more and messages:
+        next_cursor = messages[-1]["sequence"] if forward else messages[0]["sequence"]
 
+    page = {
+        "messages": messages,
+        "next_cursor": next_cursor
+    }
+    if latest:
+        HISTORY_PAGE_CACHE.set((user_id, chat_id), {"limit": limit, "page": page}, stamp=stamp)
+    return page
 
 
-def get_chat_history(chat_id: str, user_id: int):
+def get_recent_history(
+    chat_id: str,
+    user_id: int,
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+    max_messages: int = HISTORY_MAX_MESSAGES
+):
+    """
+    Prompt history: the session's rolling summary plus the most recent
+    messages not covered by it that fit in `token_budget` (the summary
+    counts against the budget too). Messages are oldest first.
+
+    Walks back from LAST_MESSAGE along NEXT, so the cost depends on the
+    window size rather than on how long the chat is. Served from
+    HISTORY_CACHE when called with the default budget.
+    """
+    cacheable = token_budget == HISTORY_TOKEN_BUDGET and max_messages == HISTORY_MAX_MESSAGES
+    if cacheable:
+        cached = HISTORY_CACHE.get((user_id, chat_id))
+        if cached is not None:
+            return cached
+        stamp = HISTORY_CACHE.stamp()
+
+    # Variable-length bounds can't be parameters; max_messages is an int
+    query = f"""
+    MATCH (u:User {{user_id: $user_id}})-[:HAS_CHAT]->(c:ChatSession {{chat_id: $chat_id}})
+    OPTIONAL MATCH (c)-[:LAST_MESSAGE]->(last:Message)
+    OPTIONAL MATCH (m:Message)-[:NEXT*0..{max(int(max_messages), 1) - 1}]->(last)
+    WHERE m.sequence > COALESCE(c.summary_upto, 0)
+    RETURN c.summary AS summary, m
+    ORDER BY m.sequence DESC
+    """
+
+    summary = None
+    messages = []
+
+    with get_neo4j_session() as session:
+        result = session.run(
+            query,
+            user_id=user_id,
+            chat_id=chat_id
+        )
+
+        for record in result:
+            summary = record["summary"]
+
+            m = record["m"]
+            if m is None:
+                break
+
+            messages.append({
+                "sender": m["sender"],
+                "text": m["text"],
+                "timestamp": m["timestamp"],
+                "sequence": m["sequence"]
+            })
+
+    messages.reverse()
+    history = _fit_history(summary, messages, token_budget, max_messages)
+
+    if cacheable:
+        HISTORY_CACHE.set((user_id, chat_id), history, stamp=stamp)
+    return history
+
+
+def get_chat_summary(chat_id: str, user_id: int):
     query = """
     MATCH (u:User {user_id: $user_id})-[:HAS_CHAT]->(c:ChatSession {chat_id: $chat_id})
-          -[:HAS_MESSAGE]->(m:Message)
+    RETURN c.summary AS summary, COALESCE(c.summary_upto, 0) AS summary_upto
+    """
+
+    with get_neo4j_session() as session:
+        record = session.run(
+            query,
+            user_id=user_id,
+            chat_id=chat_id
+        ).single()
+
+    if record is None:
+        return None
+
+    return {
+        "summary": record["summary"],
+        "summary_upto": record["summary_upto"]
+    }
+
+
+def get_messages_in_range(
+    chat_id: str,
+    user_id: int,
+    after_sequence: int,
+    upto_sequence: int,
+    limit: int = 100
+):
+    """
+    Messages with after_sequence < sequence <= upto_sequence, oldest first.
+    """
+    query = f"""
+    MATCH (m:Message)
+    WHERE m.chat_id = $chat_id AND m.sequence > $after AND m.sequence <= $upto
+      AND {_OWNS_CHAT}
     RETURN m
     ORDER BY m.sequence ASC
+    LIMIT $limit
     """
 
     messages = []
@@ -87,7 +351,10 @@ def get_chat_history(chat_id: str, user_id: int):
         result = session.run(
             query,
             user_id=user_id,
-            chat_id=chat_id
+            chat_id=chat_id,
+            after=after_sequence,
+            upto=upto_sequence,
+            limit=limit
         )
 
         for record in result:
@@ -95,48 +362,140 @@ def get_chat_history(chat_id: str, user_id: int):
             messages.append({
                 "sender": m["sender"],
                 "text": m["text"],
-                "timestamp": m["timestamp"],
                 "sequence": m["sequence"]
             })
 
     return messages
 
-def link_message_to_topics(
+
+def update_chat_summary(
     chat_id: str,
     user_id: int,
-    message_sequence: int,
-    topics: list[str]
+    summary: str,
+    previous_upto: int,
+    summary_upto: int
 ):
-    if not topics:
-        return
-
+    """
+    Store a new summary unless another refresh already moved it past
+    `previous_upto` (two background tasks for the same chat). True if
+    it was stored.
+    """
     query = """
-    MATCH (u:User {user_id: $user_id})
-          -[:HAS_CHAT]->(c:ChatSession {chat_id: $chat_id})
-          -[:HAS_MESSAGE]->(m:Message {sequence: $sequence})
-
-    UNWIND $topics AS topicName
-    MERGE (t:Topic {name: topicName, user_id: $user_id})
-    MERGE (m)-[:ABOUT_TOPIC]->(t)
+    MATCH (u:User {user_id: $user_id})-[:HAS_CHAT]->(c:ChatSession {chat_id: $chat_id})
+    WHERE COALESCE(c.summary_upto, 0) = $previous_upto
+    SET c.summary = $summary,
+        c.summary_upto = $summary_upto
+    RETURN count(c) AS updated
     """
 
     with get_neo4j_session() as session:
-        session.run(
+        updated = session.run(
             query,
             user_id=user_id,
             chat_id=chat_id,
-            sequence=message_sequence,
-            topics=topics
-        )
+            summary=summary,
+            previous_upto=previous_upto,
+            summary_upto=summary_upto
+        ).single()["updated"] > 0
+
+    if updated:
+        HISTORY_CACHE.invalidate((user_id, chat_id))
+    return updated
+
+def link_topics(links: list):
+    """
+    Write topic links for many messages in one UNWIND statement.
+    links: [{"chat_id", "user_id", "sequence", "topic"}, ...]
+
+    Maintains the counters the topic routes read, instead of aggregating
+    ABOUT_TOPIC at read time:
+      Topic.message_count / chat_count / last_seen_at
+      (ChatSession)-[:HAS_TOPIC {message_count, last_seen_at}]->(Topic)
+    Links that already exist are skipped, so a retried batch doesn't
+    count twice. Counters of topics not yet backfilled stay null until
+    backfill_topic_counters() computes them.
+    """
+    if not links:
+        return 0
+
+    query = """
+    UNWIND $links AS link
+    MATCH (c:ChatSession {chat_id: link.chat_id})
+    WHERE c.user_id = link.user_id
+    MATCH (m:Message {chat_id: link.chat_id, sequence: link.sequence})
+
+    MERGE (t:Topic {name: link.topic, user_id: link.user_id})
+      ON CREATE SET t.message_count = 0, t.chat_count = 0
+
+    WITH c, m, t
+    WHERE NOT EXISTS { (m)-[:ABOUT_TOPIC]->(t) }
+    CREATE (m)-[:ABOUT_TOPIC]->(t)
+
+    MERGE (c)-[r:HAS_TOPIC]->(t)
+      ON CREATE SET r.message_count = 0, t.chat_count = t.chat_count + 1
+    SET r.message_count = r.message_count + 1,
+        r.last_seen_at = m.timestamp,
+        t.message_count = t.message_count + 1,
+        t.last_seen_at = m.timestamp
+
+    RETURN count(*) AS linked
+    """
+
+    # Same message + topic twice in one batch would race the NOT check
+    unique = list({
+        (link["chat_id"], link["user_id"], link["sequence"], link["topic"]): link
+        for link in links
+    }.values())
+
+    with get_neo4j_session() as session:
+        return session.run(query, links=unique).single()["linked"]
+
+
+def get_user_topics(user_id: int, limit: int = 20):
+    """A user's most discussed topics, from the maintained counters."""
+    query = """
+    MATCH (t:Topic)
+    WHERE t.user_id = $user_id AND t.message_count > 0
+    RETURN
+        t.name AS name,
+        t.message_count AS message_count,
+        t.chat_count AS chat_count,
+        t.last_seen_at AS last_seen_at
+    ORDER BY t.message_count DESC, t.last_seen_at DESC
+    LIMIT $limit
+    """
+
+    with get_neo4j_session() as session:
+        result = session.run(query, user_id=user_id, limit=limit)
+        return [record.data() for record in result]
+
+
+def get_topic_chats(user_id: int, topic: str, limit: int = 20):
+    """Chats that discuss `topic`, most messages about it first."""
+    query = """
+    MATCH (t:Topic {name: $topic, user_id: $user_id})<-[r:HAS_TOPIC]-(c:ChatSession)
+    RETURN
+        c.chat_id AS chat_id,
+        COALESCE(c.title, 'New Chat') AS title,
+        r.message_count AS topic_message_count,
+        r.last_seen_at AS topic_last_seen_at,
+        c.last_message_at AS last_message_at
+    ORDER BY r.message_count DESC, r.last_seen_at DESC
+    LIMIT $limit
+    """
+
+    with get_neo4j_session() as session:
+        result = session.run(query, user_id=user_id, topic=topic, limit=limit)
+        return [record.data() for record in result]
 
 def get_first_user_messages(chat_id: str, user_id: int, limit: int = 3):
     """
     Returns the first N user messages in a chat (ordered by sequence).
     """
-    query = """
-    MATCH (u:User {user_id: $user_id})
-          -[:HAS_CHAT]->(c:ChatSession {chat_id: $chat_id})
-          -[:HAS_MESSAGE]->(m:Message {sender: 'user'})
+    query = f"""
+    MATCH (m:Message)
+    WHERE m.chat_id = $chat_id AND m.sequence > 0 AND m.sender = 'user'
+      AND {_OWNS_CHAT}
     RETURN m.text AS text
     ORDER BY m.sequence ASC
     LIMIT $limit
@@ -162,45 +521,190 @@ def update_chat_title_if_empty(
     chat_id: str,
     user_id: int,
     title: str
-):
+) -> bool:
+    """True if the title was set (the chat had none)."""
     query = """
     MATCH (u:User {user_id: $user_id})-[:HAS_CHAT]->(c:ChatSession {chat_id: $chat_id})
     WHERE c.title IS NULL
     SET c.title = $title
+    RETURN count(c) AS updated
     """
     with get_neo4j_session() as session:
-        session.run(
+        updated = session.run(
             query,
             user_id=user_id,
             chat_id=chat_id,
             title=title
+        ).single()["updated"] > 0
+
+    if updated:
+        SESSIONS_CACHE.invalidate(user_id)
+    return updated
+
+def parse_sessions_cursor(cursor: str):
+    """(last_message_at, chat_id) from a next_cursor; ValueError if malformed."""
+    last_at, sep, last_chat_id = cursor.partition("|")
+    if not sep:
+        raise ValueError("cursor must be '<last_message_at>|<chat_id>'")
+
+    # Both halves come from values this module wrote
+    datetime.fromisoformat(last_at)
+    uuid.UUID(last_chat_id)
+    return last_at, last_chat_id
+
+
+def get_user_chat_sessions(user_id: int, cursor: str = None, limit: int = 30):
+    """
+    One page of a user's chats, most recently active first.
+
+    Keyset pagination on (last_message_at, chat_id): the page is a range
+    seek on the ChatSession(user_id, last_message_at) index, read in
+    index order, so it costs O(limit) plus any chats that share the
+    cursor's timestamp (chat_id only breaks those ties), not the user's
+    whole chat list. `cursor` is the next_cursor of the previous page;
+    ValueError if it is malformed.
+    """
+    if cursor is None:
+        cached = SESSIONS_CACHE.get(user_id)
+        if cached is not None and cached["limit"] == limit:
+            return cached["page"]
+        stamp = SESSIONS_CACHE.stamp()
+        last_at, last_chat_id = None, None
+        bound = "c.last_message_at IS NOT NULL"
+    else:
+        last_at, last_chat_id = parse_sessions_cursor(cursor)
+        # The <= range is what the index seeks; the OR only drops the
+        # cursor's timestamp ties already returned
+        bound = (
+            "c.last_message_at <= $last_at "
+            "AND (c.last_message_at < $last_at OR c.chat_id < $last_chat_id)"
         )
 
-def get_user_chat_sessions(user_id: int):
-    query = """
-    MATCH (u:User {user_id: $user_id})-[:HAS_CHAT]->(c:ChatSession)
-    OPTIONAL MATCH (c)-[:HAS_MESSAGE]->(m:Message)
-    WITH c, count(m) AS messageCount
+    query = f"""
+    MATCH (c:ChatSession)
+    WHERE c.user_id = $user_id AND {bound}
     RETURN
         c.chat_id AS chat_id,
         COALESCE(c.title, 'New Chat') AS title,
         c.created_at AS created_at,
-        messageCount
-    ORDER BY c.created_at DESC
+        c.last_message_at AS last_message_at,
+        COALESCE(c.message_count, 0) AS messageCount
+    ORDER BY c.last_message_at DESC, c.chat_id DESC
+    LIMIT $limit
     """
 
     sessions = []
 
     with get_neo4j_session() as session:
-        result = session.run(query, user_id=user_id)
+        result = session.run(
+            query,
+            user_id=user_id,
+            last_at=last_at,
+            last_chat_id=last_chat_id,
+            limit=limit + 1
+        )
 
         for record in result:
             sessions.append({
                 "chat_id": record["chat_id"],
                 "title": record["title"],
                 "created_at": record["created_at"],
+                "last_message_at": record["last_message_at"],
                 "message_count": record["messageCount"]
             })
 
-    return sessions
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        last = sessions[-1]
+        next_cursor = f"{last['last_message_at']}|{last['chat_id']}"
+
+    page = {
+        "sessions": sessions,
+        "next_cursor": next_cursor
+    }
+    if cursor is None:
+        SESSIONS_CACHE.set(user_id, {"limit": limit, "page": page}, stamp=stamp)
+    return page
+
 
+def backfill_session_counters():
+    """
+    Fill user_id / message_count / last_message_at on sessions created
+    before they were maintained. Sequences are contiguous from 1, so the
+    last message's sequence is the count. No-op once everything is set.
+    """
+    query = """
+    MATCH (u:User)-[:HAS_CHAT]->(c:ChatSession)
+    WHERE c.message_count IS NULL OR c.user_id IS NULL
+    OPTIONAL MATCH (c)-[:LAST_MESSAGE]->(last:Message)
+    SET c.user_id = u.user_id,
+        c.message_count = COALESCE(last.sequence, 0),
+        c.last_message_at = COALESCE(last.timestamp, c.created_at)
+    RETURN count(c) AS updated
+    """
+
+    with get_neo4j_session() as session:
+        return session.run(query).single()["updated"]
+
+
+def backfill_message_chat_ids():
+    """
+    Set chat_id on messages stored before it was kept on Message. A
+    chat's LAST_MESSAGE is keyed once the chat is, so only chats whose
+    last message lacks it are visited. No-op once everything is set.
+    """
+    query = """
+    MATCH (c:ChatSession)-[:LAST_MESSAGE]->(last:Message)
+    WHERE last.chat_id IS NULL
+    MATCH (c)-[:HAS_MESSAGE]->(m:Message)
+    WHERE m.chat_id IS NULL
+    SET m.chat_id = c.chat_id
+    RETURN count(m) AS updated
+    """
+
+    with get_neo4j_session() as session:
+        return session.run(query).single()["updated"]
+
+
+def backfill_topic_counters():
+    """
+    Compute counters and HAS_TOPIC edges for topics linked before they
+    were maintained, from the ABOUT_TOPIC graph. No-op once every topic
+    has them.
+    """
+    query = """
+    MATCH (t:Topic)
+    WHERE t.message_count IS NULL
+    OPTIONAL MATCH (t)<-[stale:HAS_TOPIC]-()
+    DELETE stale
+
+    WITH DISTINCT t
+    MATCH (c:ChatSession)-[:HAS_MESSAGE]->(m:Message)-[:ABOUT_TOPIC]->(t)
+    WITH t, c, count(m) AS messages, max(m.timestamp) AS last_seen
+    MERGE (c)-[r:HAS_TOPIC]->(t)
+    SET r.message_count = messages, r.last_seen_at = last_seen
+
+    WITH t, count(c) AS chats, sum(messages) AS total, max(last_seen) AS last_seen
+    SET t.chat_count = chats, t.message_count = total, t.last_seen_at = last_seen
+    RETURN count(t) AS updated
+    """
+
+    with get_neo4j_session() as session:
+        return session.run(query).single()["updated"]
+
+
+# ---------------- ASYNC VARIANTS ----------------
+# Same queries, run on the bounded Neo4j thread pool so async routes
+# and background tasks never block the event loop on graph I/O.
+
+store_exchange_async = neo4j_async(store_exchange)
+get_recent_history_async = neo4j_async(get_recent_history)
+get_chat_summary_async = neo4j_async(get_chat_summary)
+get_messages_in_range_async = neo4j_async(get_messages_in_range)
+update_chat_summary_async = neo4j_async(update_chat_summary)
+link_topics_async = neo4j_async(link_topics)
+get_user_topics_async = neo4j_async(get_user_topics)
+get_topic_chats_async = neo4j_async(get_topic_chats)
+get_first_user_messages_async = neo4j_async(get_first_user_messages)
+update_chat_title_if_empty_async = neo4j_async(update_chat_title_if_empty)
@@ -0,0 +1,27 @@
+from services.micro_batcher import MicroBatcher
+
+
+class EmbeddingBatcher(MicroBatcher):
+    """
+    Coalesces concurrent single-text embedding requests into one call.
+
+    Callers await embed(text); `embed_batch(texts)` is called once per
+    batch (see MicroBatcher) and each caller gets its own vector back.
+    Duplicate texts in a batch are sent once.
+    """
+
+    def __init__(self, embed_batch, max_batch_size: int = 64, max_wait: float = 0.01):
+        super().__init__(self._embed_unique, max_batch_size, max_wait)
+        self._embed_batch = embed_batch
+        self.stats["texts_sent"] = 0
+
+    async def embed(self, text: str):
+        return await self.submit(text)
+
+    async def _embed_unique(self, texts: list) -> list:
+        unique = list(dict.fromkeys(texts))
+        self.stats["texts_sent"] += len(unique)
+
+        vectors = await self._embed_batch(unique)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[text] for text in texts]
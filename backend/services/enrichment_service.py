@@ -0,0 +1,171 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+
+from services.llm_service import get_ai_response_with_context, parse_json_reply, MODEL_NAME
+from services.topic_service import (
+    TOPIC_EXTRACTOR,
+    TOPIC_LOCAL_MIN_CONFIDENCE,
+    extract_topics_llm,
+    extract_topics_local
+)
+from services.title_service import generate_title_from_messages
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+# Topics + title for a message in one completion. Short structured
+# output, so a smaller / faster model than the chat model is enough
+ENRICH_MODEL = os.getenv("ENRICH_MODEL", MODEL_NAME)
+
+# Ask for response_format json_object (only for models that support it)
+ENRICH_JSON_MODE = os.getenv("ENRICH_JSON_MODE", "false").lower() == "true"
+
+MAX_TOPICS = 4
+TOPIC_MAX_CHARS = 60
+TITLE_MAX_WORDS = 6
+
+SYSTEM_PROMPT = (
+    "You annotate chat messages. Each numbered block below is a separate user message. "
+    "For each block return an object with:\n"
+    '- "topics": 2 to 4 short, high-level topics of the message (JSON array of strings)\n'
+    '- "title": only if the block lists the first user messages of its chat, '
+    "a short chat title based on them (maximum 6 words, no quotes, no ending punctuation)\n"
+    "Return ONLY a JSON object mapping the block number to its object, e.g. "
+    '{"1": {"topics": ["Topic"]}, "2": {"topics": ["Topic", "Topic"], "title": "Short title"}}. '
+    "No explanation, no markdown."
+)
+
+# ---------------- VALIDATION ----------------
+
+
+def clean_topics(value):
+    """Validated topic list, or None if `value` isn't a list of strings."""
+    if not isinstance(value, list):
+        return None
+
+    topics = []
+    seen = set()
+    for topic in value:
+        if not isinstance(topic, str):
+            return None
+        topic = topic.strip()[:TOPIC_MAX_CHARS]
+        if topic and topic.lower() not in seen:
+            seen.add(topic.lower())
+            topics.append(topic)
+
+    return topics[:MAX_TOPICS]
+
+
+def clean_title(value):
+    if not isinstance(value, str):
+        return None
+
+    words = value.strip().strip("\"'").split()[:TITLE_MAX_WORDS]
+    title = " ".join(words).rstrip(".!?,;:")
+    return title or None
+
+# ---------------- ENRICHMENT ----------------
+
+
+def _block(number: int, text: str, title_messages: list) -> str:
+    block = f"[{number}]\nMessage:\n{text}"
+    if title_messages:
+        block += "\nFirst user messages of the chat:\n" + "\n".join(
+            f"{i}. {message}" for i, message in enumerate(title_messages, 1)
+        )
+    return block
+
+
+async def enrich_messages(items: list) -> list:
+    """
+    items: (user_id, text, title_messages); title_messages is the
+    chat's first user messages when it needs a title, else None.
+
+    Returns one {"topics": [...], "title": str | None} per item. Topics
+    come from the local extractor when it is confident (TOPIC_EXTRACTOR);
+    everything else goes to ENRICH_MODEL in a single call. Items the
+    reply doesn't cover are filled in with the separate topic / title
+    calls, concurrently and on ENRICH_MODEL as well.
+    """
+    results = []
+    local_topics = []
+    pending = []
+
+    for user_id, text, title_messages in items:
+        topics = None
+        local = []
+        if TOPIC_EXTRACTOR != "llm":
+            local, confidence = extract_topics_local(user_id, text)
+            if TOPIC_EXTRACTOR == "local" or confidence >= TOPIC_LOCAL_MIN_CONFIDENCE:
+                topics = local
+
+        results.append({"topics": topics, "title": None})
+        local_topics.append(local)
+        if topics is None or title_messages:
+            pending.append(len(results) - 1)
+
+    if not pending:
+        return results
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": "\n\n".join(
+                _block(number, items[i][1], items[i][2])
+                for number, i in enumerate(pending, 1)
+            )
+        }
+    ]
+
+    reply = await get_ai_response_with_context(
+        messages,
+        model=ENRICH_MODEL,
+        response_format={"type": "json_object"} if ENRICH_JSON_MODE else None
+    )
+    parsed = parse_json_reply(reply)
+    if not isinstance(parsed, dict):
+        parsed = {}
+
+    # A single item may come back unwrapped
+    if len(pending) == 1 and "topics" in parsed:
+        parsed = {"1": parsed}
+
+    # Items the reply doesn't cover fall back to the separate calls, on
+    # the same model and all at once
+    fallbacks = []
+
+    for number, i in enumerate(pending, 1):
+        _, text, title_messages = items[i]
+        entry = parsed.get(str(number))
+        if not isinstance(entry, dict):
+            entry = {}
+
+        if results[i]["topics"] is None:
+            topics = clean_topics(entry.get("topics"))
+            if topics is None:
+                fallbacks.append((i, "topics", extract_topics_llm(text, model=ENRICH_MODEL)))
+            else:
+                results[i]["topics"] = topics
+
+        if title_messages:
+            title = clean_title(entry.get("title"))
+            if title is None:
+                fallbacks.append((i, "title", generate_title_from_messages(title_messages, model=ENRICH_MODEL)))
+            else:
+                results[i]["title"] = title
+
+    if fallbacks:
+        values = await asyncio.gather(*(call for _, _, call in fallbacks))
+        for (i, field, _), value in zip(fallbacks, values):
+            # Same cleanup as a batched title; "" stays None
+            results[i][field] = clean_title(value) if field == "title" else value
+
+    for i in pending:
+        # Low-confidence local topics beat none at all
+        if results[i]["topics"] is None:
+            results[i]["topics"] = local_topics[i]
+
+    return results
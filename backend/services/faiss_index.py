@@ -0,0 +1,179 @@
+import os
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+# Flat | IVFFlat | IVFPQ | HNSW
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "Flat")
+
+# How vectors are stored inside the index: float32 | float16 | SQ8 | PQ.
+# Compressed modes re-rank the top FAISS_RERANK_FACTOR * top_k candidates
+# with the exact float32 vectors kept on disk.
+FAISS_STORAGE = os.getenv("FAISS_STORAGE", "float32")
+FAISS_RERANK_FACTOR = int(os.getenv("FAISS_RERANK_FACTOR", "4"))
+
+FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = 4 * sqrt(n)
+FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "64"))
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+
+INDEX_TYPES = ("Flat", "IVFFlat", "IVFPQ", "HNSW")
+STORAGE_TYPES = ("float32", "float16", "SQ8", "PQ")
+TRAINED_TYPES = ("IVFFlat", "IVFPQ")
+
+# FAISS warns below ~39 training points per centroid
+TRAIN_POINTS_PER_CENTROID = 39
+
+
+def ivf_nlist(count: int) -> int:
+    if FAISS_IVF_NLIST:
+        return FAISS_IVF_NLIST
+    return max(1, int(4 * np.sqrt(count)))
+
+
+def _storage_spec(index_type: str, storage: str) -> str:
+    if index_type == "IVFPQ":
+        storage = "PQ"
+
+    if storage == "float32":
+        return "Flat"
+    if storage == "float16":
+        return "SQfp16"
+    if storage == "SQ8":
+        return "SQ8"
+    if storage == "PQ":
+        # HNSW+PQ only supports 8-bit codes
+        return f"PQ{FAISS_PQ_M}" if index_type == "HNSW" else f"PQ{FAISS_PQ_M}x{FAISS_PQ_NBITS}"
+
+    raise ValueError(f"Unknown FAISS_STORAGE {storage!r}, expected one of {STORAGE_TYPES}")
+
+
+def index_spec(index_type: str, storage: str, count: int) -> str:
+    """faiss.index_factory string, e.g. "IVF400,SQ8" or "HNSW32_SQfp16"."""
+    codes = _storage_spec(index_type, storage)
+
+    if index_type == "Flat":
+        return codes
+    if index_type in TRAINED_TYPES:
+        return f"IVF{ivf_nlist(count)},{codes}"
+    if index_type == "HNSW":
+        return f"HNSW{FAISS_HNSW_M}" if codes == "Flat" else f"HNSW{FAISS_HNSW_M}_{codes}"
+
+    raise ValueError(f"Unknown FAISS_INDEX_TYPE {index_type!r}, expected one of {INDEX_TYPES}")
+
+
+def can_train(index_type: str, count: int, storage: str = FAISS_STORAGE) -> bool:
+    if index_type in TRAINED_TYPES and count < ivf_nlist(count) * TRAIN_POINTS_PER_CENTROID:
+        return False
+    if index_type == "IVFPQ" or storage == "PQ":
+        nbits = 8 if index_type == "HNSW" else FAISS_PQ_NBITS
+        if count < 2 ** nbits * TRAIN_POINTS_PER_CENTROID:
+            return False
+    if storage == "SQ8" and count == 0:
+        return False
+    return True
+
+
+def _base_index(index_type: str, dim: int, count: int, storage: str = FAISS_STORAGE):
+    index = faiss.index_factory(dim, index_spec(index_type, storage, count))
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+    return index
+
+
+def new_index(dim: int, index_type: str = FAISS_INDEX_TYPE, storage: str = FAISS_STORAGE):
+    """
+    Empty index for a new partition. Combinations that need training
+    start as exact Flat; rebuild_index.py converts them once they have
+    enough vectors.
+    """
+    base = _base_index(index_type, dim, 0, storage) if index_type not in TRAINED_TYPES else None
+    if base is None or not base.is_trained:
+        base = faiss.IndexFlatL2(dim)
+    return configure(faiss.IndexIDMap2(base))
+
+
+def build_index(
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    index_type: str = FAISS_INDEX_TYPE,
+    storage: str = FAISS_STORAGE
+):
+    """
+    Index of `index_type`/`storage` over `vectors` (trained on them when
+    needed), falling back to exact Flat when there are too few vectors
+    to train.
+    """
+    count, dim = vectors.shape
+    if not can_train(index_type, count, storage):
+        index_type, storage = "Flat", "float32"
+
+    base = _base_index(index_type, dim, count, storage)
+    if not base.is_trained:
+        base.train(vectors)
+    if isinstance(base, faiss.IndexIVF):
+        # keep reconstruct() working for the vector backfill
+        base.make_direct_map()
+
+    index = faiss.IndexIDMap2(base)
+    if count:
+        index.add_with_ids(vectors, ids.astype("int64"))
+    return configure(index)
+
+
+def _unwrap(index):
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+
+def index_type_of(index) -> str:
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return "HNSW"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "IVFPQ"
+    if isinstance(base, faiss.IndexIVF):
+        return "IVFFlat"
+    return "Flat"
+
+
+def storage_of(index) -> str:
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+
+    if isinstance(base, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "PQ"
+    if isinstance(base, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "float16" if base.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "SQ8"
+    return "float32"
+
+
+def is_lossy(index) -> bool:
+    """True when stored codes only approximate the vectors (needs re-ranking)."""
+    return storage_of(index) != "float32"
+
+
+def configure(index):
+    """Apply search-time parameters (not all of them survive write_index)."""
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = FAISS_IVF_NPROBE
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+    return index
+
+
+def read_vectors(index):
+    """(vectors, ids) stored in an IndexIDMap2 partition."""
+    ids = faiss.vector_to_array(index.id_map).astype("int64")
+    if len(ids) == 0:
+        return np.zeros((0, index.d), dtype="float32"), ids
+    return index.index.reconstruct_n(0, index.ntotal), ids
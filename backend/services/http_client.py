@@ -0,0 +1,65 @@
+import os
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "30"))
+
+LLM_HTTP_TIMEOUT = httpx.Timeout(LLM_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+EMBED_HTTP_TIMEOUT = httpx.Timeout(EMBED_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+# HTTP/2 needs the optional `h2` package (httpx[http2])
+try:
+    import h2  # noqa: F401
+except ImportError:
+    HTTP2_ENABLED = False
+
+# ---------------- SHARED CLIENT ----------------
+
+_client = None
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """
+    Create the process-wide client. Called from the app startup hook;
+    get_http_client() also creates it lazily for scripts and workers.
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=LLM_HTTP_TIMEOUT
+        )
+
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    if _client is None or _client.is_closed:
+        return init_http_client()
+    return _client
+
+
+async def close_http_client():
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
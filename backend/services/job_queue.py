@@ -0,0 +1,265 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Kept free of app imports: the web app only enqueues, worker.py runs
+# the jobs
+
+# ---------------- CONFIG ----------------
+
+# One SQLite file shared by the web app and the workers (same host or
+# same volume); WAL mode lets enqueues proceed while a worker claims
+JOB_QUEUE_PATH = os.getenv(
+    "JOB_QUEUE_PATH",
+    f"{os.getenv('FAISS_DIR', '/app/faiss')}/jobs.db"
+)
+
+# Attempts before a job is parked as "failed"; retries back off
+# exponentially from JOB_RETRY_BASE up to JOB_RETRY_MAX seconds
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "2"))
+JOB_RETRY_MAX = float(os.getenv("JOB_RETRY_MAX", "300"))
+
+# A claimed job not completed within the lease (worker killed) is
+# handed out again
+JOB_LEASE = float(os.getenv("JOB_LEASE", "300"))
+
+# Finished jobs are deleted after this many seconds; failed ones are kept
+JOB_KEEP_DONE = float(os.getenv("JOB_KEEP_DONE", "3600"))
+
+# Cache invalidations published by the workers for the web processes,
+# kept long enough for every web process to have polled them
+CACHE_EVENTS_KEEP = float(os.getenv("CACHE_EVENTS_KEEP", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    run_at REAL NOT NULL,
+    lease_until REAL,
+    finished_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(type, status, run_at);
+CREATE TABLE IF NOT EXISTS cache_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class Job(NamedTuple):
+    id: int
+    type: str
+    payload: dict
+    attempts: int
+
+
+class JobQueue:
+    """
+    Durable queue in a SQLite file. Jobs move queued -> running -> done,
+    or back to queued with a later run_at on failure, until
+    JOB_MAX_ATTEMPTS is reached and they are left as "failed".
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (callers use asyncio.to_thread)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, jobs: list, delay: float = 0.0):
+        """jobs: list of (type, payload dict), inserted in one transaction."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO jobs (type, payload, enqueued_at, run_at) VALUES (?, ?, ?, ?)",
+                [(job_type, json.dumps(payload), now, now + delay) for job_type, payload in jobs]
+            )
+
+    def claim(self, job_type: str, limit: int) -> List[Job]:
+        """Lease up to `limit` due jobs of one type, oldest first."""
+        now = time.time()
+        conn = self._connect()
+
+        # IMMEDIATE takes the write lock up front, so two workers can't
+        # select the same rows
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases that expired on their last attempt
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', finished_at = ?, last_error = 'lease expired'
+                WHERE type = ? AND status = 'running' AND lease_until < ? AND attempts >= ?
+                """,
+                (now, job_type, now, JOB_MAX_ATTEMPTS)
+            )
+
+            rows = conn.execute(
+                """
+                SELECT id, payload, attempts FROM jobs
+                WHERE type = ?
+                  AND ((status = 'queued' AND run_at <= ?)
+                       OR (status = 'running' AND lease_until < ?))
+                ORDER BY run_at, id
+                LIMIT ?
+                """,
+                (job_type, now, now, limit)
+            ).fetchall()
+
+            conn.executemany(
+                """
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?
+                WHERE id = ?
+                """,
+                [(now + JOB_LEASE, job_id) for job_id, _, _ in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        return [
+            Job(job_id, job_type, json.loads(payload), attempts + 1)
+            for job_id, payload, attempts in rows
+        ]
+
+    def complete(self, job_ids: List[int]):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE jobs SET status = 'done', finished_at = ?, last_error = NULL WHERE id = ?",
+                [(now, job_id) for job_id in job_ids]
+            )
+
+    def fail(self, job: Job, error: str):
+        now = time.time()
+        conn = self._connect()
+
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            with conn:
+                conn.execute("BEGIN")
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ? WHERE id = ?",
+                    (now, error, job.id)
+                )
+            return
+
+        # Exponential backoff with jitter, so a failing upstream isn't
+        # hit by every retry at the same moment
+        delay = min(JOB_RETRY_MAX, JOB_RETRY_BASE * 2 ** (job.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', run_at = ?, last_error = ? WHERE id = ?",
+                (now + delay, error, job.id)
+            )
+
+    def purge(self, older_than: float = JOB_KEEP_DONE) -> int:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status = 'done' AND finished_at < ?",
+                (now - older_than,)
+            )
+            conn.execute(
+                "DELETE FROM cache_events WHERE created_at < ?",
+                (now - CACHE_EVENTS_KEEP,)
+            )
+        return cursor.rowcount
+
+    # ---- cache events: worker writes -> web process caches ----
+
+    def publish_cache_events(self, events: list):
+        """events: list of (cache name, key); tuple keys travel as lists."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO cache_events (cache, key, created_at) VALUES (?, ?, ?)",
+                [(cache, json.dumps(key), now) for cache, key in events]
+            )
+
+    def cache_events_since(self, after_id: int, limit: int = 1000) -> list:
+        """[(id, cache name, key)] published after `after_id`, oldest first."""
+        rows = self._connect().execute(
+            "SELECT id, cache, key FROM cache_events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+        return [(event_id, cache, json.loads(key)) for event_id, cache, key in rows]
+
+    def last_cache_event_id(self) -> int:
+        row = self._connect().execute("SELECT MAX(id) FROM cache_events").fetchone()
+        return row[0] or 0
+
+    def stats(self) -> dict:
+        """
+        Depth per type and status, and lag per type: how long the
+        oldest due job has been waiting (0 when the workers keep up).
+        """
+        now = time.time()
+        rows = self._connect().execute(
+            """
+            SELECT type, status, COUNT(*),
+                   MIN(CASE WHEN status = 'queued' AND run_at <= ? THEN run_at END)
+            FROM jobs GROUP BY type, status
+            """,
+            (now,)
+        ).fetchall()
+
+        depth = {}
+        lag = {}
+        for job_type, status, count, oldest_due in rows:
+            depth.setdefault(job_type, {})[status] = count
+            lag.setdefault(job_type, 0.0)
+            if oldest_due is not None:
+                lag[job_type] = round(max(lag[job_type], now - oldest_due), 3)
+
+        return {"depth": depth, "lag_seconds": lag}
+
+
+JOB_QUEUE = JobQueue(JOB_QUEUE_PATH)
+
+
+async def enqueue_jobs(jobs: list):
+    await asyncio.to_thread(JOB_QUEUE.enqueue, jobs)
+
+
+async def job_queue_stats() -> dict:
+    return await asyncio.to_thread(JOB_QUEUE.stats)
+
+
+async def publish_cache_events(events: list):
+    await asyncio.to_thread(JOB_QUEUE.publish_cache_events, events)
@@ -0,0 +1,240 @@
+import math
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+# In-process topic extraction: RAKE candidate phrases, weighted by an
+# IDF over the user's own past messages (blended with a global prior
+# while the user's vocabulary is still small).
+
+WORD = re.compile(r"[A-Za-z][A-Za-z0-9+#]*(?:[.\-'][A-Za-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before
+being below between both but by can can't cannot could couldn't did didn't do does doesn't doing
+don't down during each few for from further had hadn't has hasn't have haven't having he her here
+hers herself him himself his how i i'd i'll i'm i've if in into is isn't it it's its itself let's
+me more most mustn't my myself no nor not of off on once only or other ought our ours ourselves out
+over own same shan't she should shouldn't so some such than that that's the their theirs them
+themselves then there there's these they they'd they'll they're they've this those through to too
+under until up very was wasn't we we'd we'll we're we've were weren't what what's when where which
+while who who's whom why will with won't would wouldn't you you'd you'll you're you've your yours
+yourself yourselves
+hi hello hey thanks thank please ok okay yes yeah sure hmm
+can could would should might may must shall will
+want wanted need needs needed know knew tell told explain explained show give get got make made
+use used using like really just still even also maybe actually basically something anything
+everything nothing someone anyone thing things stuff way ways lot lots kind sort bit question
+questions help helps answer example examples mean means good better best bad new old one two first
+last next many much well now today tomorrow yesterday time times day days try trying tried work
+works working look looking say said see seem seems think thought going go goes went come take
+difference different between vs versus does did done doing
+write create build find fix list compare describe recommend suggest quick simple easy
+""".split())
+
+MAX_PHRASE_WORDS = 3
+
+
+def _normalize(word: str) -> str:
+    """Vocabulary key: lowercase, crude plural folding."""
+    word = word.lower()
+    if len(word) > 4 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    return word
+
+
+def _display(word: str) -> str:
+    # Keep deliberate casing (FastAPI, SQL, iOS), title-case the rest
+    return word if word.lower() != word else word.capitalize()
+
+
+def candidate_phrases(text: str) -> list:
+    """
+    RAKE candidates: runs of content words between stopwords and
+    punctuation, split into chunks of at most MAX_PHRASE_WORDS.
+    Each phrase is a list of original-case words.
+    """
+    phrases = []
+    run = []
+    last_end = 0
+
+    for match in WORD.finditer(text):
+        word = match.group()
+        gap = text[last_end:match.start()]
+        last_end = match.end()
+
+        if gap.strip() or word.lower() in STOPWORDS or len(word) < 2:
+            if run:
+                phrases.append(run)
+            run = []
+        if word.lower() not in STOPWORDS and len(word) >= 2:
+            run.append(word)
+
+    if run:
+        phrases.append(run)
+
+    return [
+        run[i:i + MAX_PHRASE_WORDS]
+        for run in phrases
+        for i in range(0, len(run), MAX_PHRASE_WORDS)
+    ]
+
+
+class Vocabulary:
+    """
+    Document frequencies for one user (or the global prior). Past
+    `max_docs` documents all counts are halved, so old traffic ages out
+    and terms whose count reaches zero are dropped.
+    """
+
+    def __init__(self, max_docs: int = None):
+        self.max_docs = max_docs
+        self.index = {}
+        self.df = np.zeros(64, dtype="int32")
+        self.docs = 0
+
+    def lookup(self, keys: list) -> np.ndarray:
+        ids = np.array([self.index.get(key, -1) for key in keys], dtype="int64")
+        return np.where(ids >= 0, self.df[np.maximum(ids, 0)], 0)
+
+    def observe(self, keys: set):
+        for key in keys:
+            if key not in self.index:
+                self.index[key] = len(self.index)
+        if len(self.index) > len(self.df):
+            grown = np.zeros(max(len(self.index), 2 * len(self.df)), dtype="int32")
+            grown[:len(self.df)] = self.df
+            self.df = grown
+
+        self.df[[self.index[key] for key in keys]] += 1
+        self.docs += 1
+
+        if self.max_docs and self.docs > self.max_docs:
+            self._decay()
+
+    def _decay(self):
+        df = self.df[:len(self.index)] // 2
+        kept = [(key, df[i]) for key, i in self.index.items() if df[i] > 0]
+
+        self.index = {key: i for i, (key, _) in enumerate(kept)}
+        self.df = np.zeros(max(64, len(kept)), dtype="int32")
+        self.df[:len(kept)] = [count for _, count in kept]
+        self.docs //= 2
+
+
+class KeyphraseExtractor:
+    """
+    extract(user_id, text) -> (topics, confidence in [0, 1]).
+
+    Confidence is low while the (blended) vocabulary has fewer than
+    `warmup_docs` documents, and when the chosen phrases are made of
+    words the user uses all the time (low IDF) -- cases better left to
+    the LLM.
+    """
+
+    def __init__(
+        self,
+        max_topics: int = 4,
+        warmup_docs: int = 20,
+        prior_docs: int = 50,
+        max_users: int = 10000,
+        max_docs: int = 5000,
+        max_global_docs: int = 50000
+    ):
+        self.max_topics = max_topics
+        self.warmup_docs = warmup_docs
+        self.prior_docs = prior_docs
+        self.max_users = max_users
+        self.max_docs = max_docs
+        self.global_vocabulary = Vocabulary(max_global_docs)
+        self._users = OrderedDict()
+
+    def _vocabulary(self, user_id) -> Vocabulary:
+        vocabulary = self._users.get(user_id)
+        if vocabulary is None:
+            vocabulary = self._users[user_id] = Vocabulary(self.max_docs)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        return vocabulary
+
+    def extract(self, user_id, text: str, observe: bool = True):
+        phrases = candidate_phrases(text)
+        user_vocabulary = self._vocabulary(user_id)
+
+        if not phrases:
+            return [], 0.0
+
+        keys = sorted({_normalize(word) for phrase in phrases for word in phrase})
+        position = {key: i for i, key in enumerate(keys)}
+        phrase_ids = [np.array([position[_normalize(w)] for w in phrase]) for phrase in phrases]
+
+        # RAKE word score: degree / frequency within this message
+        frequency = np.zeros(len(keys))
+        degree = np.zeros(len(keys))
+        for ids in phrase_ids:
+            np.add.at(frequency, ids, 1)
+            np.add.at(degree, ids, len(ids))
+        rake = degree / frequency
+
+        # IDF over the user's messages plus a scaled-down global prior
+        global_docs = self.global_vocabulary.docs
+        alpha = min(1.0, self.prior_docs / global_docs) if global_docs else 0.0
+        docs = user_vocabulary.docs + alpha * global_docs
+        df = user_vocabulary.lookup(keys) + alpha * self.global_vocabulary.lookup(keys)
+        idf = np.log((1 + docs) / (1 + df)) + 1
+        idf_max = math.log(1 + docs) + 1
+
+        weights = rake * idf
+
+        # Distinct phrases, repeated ones get a small bonus
+        scored = {}
+        for phrase, ids in zip(phrases, phrase_ids):
+            key = tuple(ids.tolist())
+            if key in scored:
+                scored[key][1] += 0.5 * weights[ids].sum()
+            else:
+                scored[key] = [phrase, float(weights[ids].sum())]
+
+        ranked = sorted(scored.items(), key=lambda item: -item[1][1])
+
+        chosen = []
+        chosen_ids = []
+        seen_words = set()
+        for ids, (phrase, _) in ranked:
+            # Skip phrases whose words are all covered already
+            if set(ids) <= seen_words:
+                continue
+            chosen.append(" ".join(_display(word) for word in phrase))
+            chosen_ids.extend(ids)
+            seen_words.update(ids)
+            if len(chosen) == self.max_topics:
+                break
+
+        specificity = float(np.mean(idf[chosen_ids]) / idf_max)
+        warmth = min(1.0, docs / self.warmup_docs)
+        coverage = min(1.0, len(chosen) / 2)
+        confidence = round(coverage * warmth * specificity, 4)
+
+        if observe:
+            self.observe(user_id, set(keys))
+
+        return chosen, confidence
+
+    def observe(self, user_id, keys: set):
+        self._vocabulary(user_id).observe(keys)
+        self.global_vocabulary.observe(keys)
+
+    def observe_text(self, user_id, text: str):
+        """Count `text` as a document (for extract(..., observe=False) callers)."""
+        keys = {_normalize(word) for phrase in candidate_phrases(text) for word in phrase}
+        if keys:
+            self.observe(user_id, keys)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "global_docs": self.global_vocabulary.docs,
+            "global_terms": len(self.global_vocabulary.index)
+        }
@@ -1,7 +1,10 @@
-import httpx
+import json
 import os
+import re
 from dotenv import load_dotenv
 
+from services.http_client import get_http_client, LLM_HTTP_TIMEOUT
+
 load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -15,25 +18,101 @@ MODEL_NAME = "meta-llama/llama-3-8b-instruct"
 
 
 
-async def get_ai_response_with_context(messages: list):
+def parse_json_reply(reply: str):
+    """
+    json.loads with the usual small-model repairs: markdown fences,
+    prose around the JSON, trailing commas. None if still invalid.
+    """
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", reply.strip())
+
+    candidates = [text]
+    for opening, closing in ("{}", "[]"):
+        start, end = text.find(opening), text.rfind(closing)
+        if 0 <= start < end:
+            candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        for attempt in (candidate, re.sub(r",\s*([}\]])", r"\1", candidate)):
+            try:
+                return json.loads(attempt)
+            except ValueError:
+                continue
+
+    return None
+
+
+async def get_ai_response_with_context(
+    messages: list,
+    model: str = MODEL_NAME,
+    response_format: dict = None
+):
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json"
     }
 
     payload = {
-        "model": MODEL_NAME,
+        "model": model,
         "messages": messages
     }
+    if response_format:
+        payload["response_format"] = response_format
     # print("=======================")
     # print(messages)
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            OPENROUTER_URL,
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
+    response = await get_http_client().post(
+        OPENROUTER_URL,
+        headers=headers,
+        json=payload,
+        timeout=LLM_HTTP_TIMEOUT
+    )
 
     data = response.json()
     return data["choices"][0]["message"]["content"]
+
+
+async def stream_ai_response_with_context(messages: list):
+    """
+    Same request as get_ai_response_with_context, but with "stream": true.
+    Yields content deltas as OpenRouter sends them (SSE "data:" lines).
+    """
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    payload = {
+        "model": MODEL_NAME,
+        "messages": messages,
+        "stream": True
+    }
+
+    async with get_http_client().stream(
+        "POST",
+        OPENROUTER_URL,
+        headers=headers,
+        json=payload,
+        timeout=LLM_HTTP_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            # SSE comments (": OPENROUTER PROCESSING") and blank keep-alives
+            if not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+
+            token = (choices[0].get("delta") or {}).get("content")
+            if token:
+                yield token
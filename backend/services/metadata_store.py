@@ -0,0 +1,182 @@
+import os
+
+import numpy as np
+
+# Columns, one file each under the store directory:
+#   user_ids.i64      int64[rows]      owner of each vector row
+#   msg_offsets.i64   int64[rows + 1]  byte offsets into msg.bin
+#   msg.bin           utf-8 message ids, concatenated
+#   text_offsets.i64  int64[rows + 1]  byte offsets into text.bin
+#   text.bin          utf-8 message texts, concatenated
+#   vectors.f32       float32[rows, dim] exact vectors (re-ranking, rebuilds)
+USER_IDS = "user_ids.i64"
+MSG_OFFSETS = "msg_offsets.i64"
+MSG_BLOB = "msg.bin"
+TEXT_OFFSETS = "text_offsets.i64"
+TEXT_BLOB = "text.bin"
+VECTORS = "vectors.f32"
+
+
+def _map(path: str, dtype: str, count: int, width: int = None):
+    shape = (count,) if width is None else (count, width)
+    if count == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class MetadataStore:
+    """
+    Per-row metadata for the vector partitions (row == FAISS id).
+
+    Persisted rows are read-only memory maps, so nothing is deserialized
+    at startup and several workers share the same page cache. Rows added
+    since the last snapshot sit in a small in-memory tail until
+    write() + commit() append them to the column files.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.directory = directory
+        self.dim = dim
+        self.persisted_rows = 0
+        self._tail = []
+        self._tail_vectors = []
+        self._remap()
+
+    def _path(self, name: str) -> str:
+        return f"{self.directory}/{name}"
+
+    def _remap(self):
+        rows = self.persisted_rows
+        self._user_ids = _map(self._path(USER_IDS), "int64", rows)
+        self._msg_offsets = _map(self._path(MSG_OFFSETS), "int64", rows + 1 if rows else 0)
+        self._text_offsets = _map(self._path(TEXT_OFFSETS), "int64", rows + 1 if rows else 0)
+        self._msg_blob = _map(self._path(MSG_BLOB), "uint8", int(self._msg_offsets[-1]) if rows else 0)
+        self._text_blob = _map(self._path(TEXT_BLOB), "uint8", int(self._text_offsets[-1]) if rows else 0)
+        self._vectors = _map(self._path(VECTORS), "float32", rows if self.has_vectors() else 0, self.dim)
+
+    def exists(self) -> bool:
+        return os.path.exists(self._path(USER_IDS))
+
+    def has_vectors(self) -> bool:
+        """False for stores written before the vector column existed."""
+        path = self._path(VECTORS)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        return size >= self.persisted_rows * self.dim * 4
+
+    def load(self, rows: int):
+        """Map the first `rows` rows (the count recorded by the last snapshot)."""
+        self.persisted_rows = rows if self.exists() else 0
+        self._tail = []
+        self._tail_vectors = []
+        self._remap()
+
+    # ---------------- READ ----------------
+
+    def __len__(self) -> int:
+        return self.persisted_rows + len(self._tail)
+
+    def user_id(self, row: int) -> int:
+        if row < self.persisted_rows:
+            return int(self._user_ids[row])
+        return self._tail[row - self.persisted_rows]["user_id"]
+
+    def user_ids(self, count: int) -> np.ndarray:
+        persisted = np.asarray(self._user_ids[:min(count, self.persisted_rows)])
+        extra = [meta["user_id"] for meta in self._tail[:max(0, count - self.persisted_rows)]]
+        return np.concatenate([persisted, np.array(extra, dtype="int64")])
+
+    def _string(self, blob, offsets, row: int) -> str:
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def get(self, row: int) -> dict:
+        if row >= self.persisted_rows:
+            return self._tail[row - self.persisted_rows]
+        return {
+            "user_id": int(self._user_ids[row]),
+            "message_id": self._string(self._msg_blob, self._msg_offsets, row),
+            "text": self._string(self._text_blob, self._text_offsets, row)
+        }
+
+    def texts(self, rows: list) -> list:
+        return [
+            self._string(self._text_blob, self._text_offsets, row)
+            if row < self.persisted_rows
+            else self._tail[row - self.persisted_rows]["text"]
+            for row in rows
+        ]
+
+    def vectors(self, rows: list) -> np.ndarray:
+        """Exact float32 vectors for `rows`, shape (len(rows), dim)."""
+        out = np.empty((len(rows), self.dim), dtype="float32")
+        for i, row in enumerate(rows):
+            if row < self.persisted_rows:
+                out[i] = self._vectors[row]
+            else:
+                out[i] = self._tail_vectors[row - self.persisted_rows]
+        return out
+
+    # ---------------- WRITE ----------------
+
+    def append(self, meta: dict, vector: np.ndarray):
+        self._tail.append(meta)
+        self._tail_vectors.append(np.asarray(vector, dtype="float32").reshape(self.dim))
+
+    def pending(self):
+        """(first unpersisted row, tail records, tail vectors) for a snapshot."""
+        vectors = np.array(self._tail_vectors, dtype="float32").reshape(-1, self.dim)
+        return self.persisted_rows, list(self._tail), vectors
+
+    def write_vectors(self, start: int, vectors: np.ndarray):
+        os.makedirs(self.directory, exist_ok=True)
+        data = np.ascontiguousarray(vectors, dtype="float32").tobytes()
+        self._write_at(VECTORS, start * self.dim * 4, data)
+
+    def _write_at(self, name: str, position: int, data: bytes):
+        path = self._path(name)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.truncate(position)
+            f.seek(position)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write(self, start: int, records: list, vectors: np.ndarray):
+        """
+        Append `records` as rows start.. to the column files. Anything past
+        row `start` left by an interrupted write is overwritten. Doesn't
+        touch in-memory state, so it can run outside the caller's lock.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        msg_end = int(self._msg_offsets[start]) if start else 0
+        text_end = int(self._text_offsets[start]) if start else 0
+
+        user_ids = np.array([meta["user_id"] for meta in records], dtype="int64")
+        msg_bytes = [meta["message_id"].encode("utf-8") for meta in records]
+        text_bytes = [meta["text"].encode("utf-8") for meta in records]
+
+        msg_offsets = msg_end + np.cumsum([len(b) for b in msg_bytes], dtype="int64")
+        text_offsets = text_end + np.cumsum([len(b) for b in text_bytes], dtype="int64")
+        if start == 0:
+            msg_offsets = np.concatenate([np.zeros(1, dtype="int64"), msg_offsets])
+            text_offsets = np.concatenate([np.zeros(1, dtype="int64"), text_offsets])
+
+        offset_position = (start + 1) * 8 if start else 0
+
+        for name, position, data in (
+            (USER_IDS, start * 8, user_ids.tobytes()),
+            (MSG_OFFSETS, offset_position, msg_offsets.tobytes()),
+            (MSG_BLOB, msg_end, b"".join(msg_bytes)),
+            (TEXT_OFFSETS, offset_position, text_offsets.tobytes()),
+            (TEXT_BLOB, text_end, b"".join(text_bytes)),
+        ):
+            self._write_at(name, position, data)
+
+        self.write_vectors(start, vectors)
+
+    def commit(self, rows: int):
+        """Rows < `rows` are on disk now: map them and drop them from the tail."""
+        self._tail = self._tail[rows - self.persisted_rows:]
+        self._tail_vectors = self._tail_vectors[rows - self.persisted_rows:]
+        self.persisted_rows = rows
+        self._remap()
@@ -0,0 +1,85 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one batch call.
+
+    Callers await submit(item). Items are collected until their total
+    `weight` (1 per item by default) reaches `max_batch_size` or
+    `max_wait` seconds have passed since the first one, then
+    `send_batch(items)` is called once. It returns one result per item,
+    or None when there is nothing to return; each caller gets its own
+    result, or the batch's exception.
+    """
+
+    def __init__(self, send_batch, max_batch_size: int, max_wait: float, weight=None):
+        self._send_batch = send_batch
+        self._weight = weight or (lambda item: 1)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._loop = None
+        self._pending = []
+        self._pending_weight = 0
+        self._timer = None
+        self._inflight = set()
+
+        self.stats = {"requests": 0, "batches": 0}
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+
+        # Pending futures belong to one loop (matters for scripts that call
+        # asyncio.run() more than once)
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._pending_weight = 0
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_weight += self._weight(item)
+        self.stats["requests"] += 1
+
+        if self._pending_weight >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = []
+        self._pending_weight = 0
+
+        task = self._loop.create_task(self._send(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: list):
+        self.stats["batches"] += 1
+
+        try:
+            results = await self._send_batch([item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        if results is None:
+            results = [None] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
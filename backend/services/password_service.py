@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Kept free of app imports: pool workers import this module, not auth.py
+
+# ---------------- CONFIG ----------------
+
+# bcrypt is CPU-bound; hash in worker processes (0 = one per core)
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "0")) or os.cpu_count() or 1
+
+# Hashing jobs allowed in flight (running + queued) before callers get
+# PasswordPoolFull, so a login storm sheds load instead of piling up
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "256"))
+
+
+# ---------------- PASSWORD HASHING ----------------
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def hash_password(password: str) -> str:
+    password = password[:72]  # bcrypt hard limit
+    return pwd_context.hash(password)
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+# ---------------- PROCESS POOL ----------------
+
+class PasswordPoolFull(Exception):
+    pass
+
+
+_pool = None
+_slots = None
+_workers = 0
+_pending = 0
+
+
+def init_password_pool(workers: int = PASSWORD_WORKERS):
+    global _pool, _slots, _workers
+
+    close_password_pool()
+    _workers = workers
+    # spawn, not fork: the app process already runs driver/executor threads
+    _pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    _slots = asyncio.Semaphore(workers)
+
+    # Start the workers now rather than on the first login
+    for _ in range(workers):
+        _pool.submit(os.getpid)
+
+
+def close_password_pool():
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn, *args):
+    global _pending
+
+    if _pool is None:
+        init_password_pool()
+
+    if _pending >= PASSWORD_MAX_PENDING:
+        raise PasswordPoolFull()
+
+    _pending += 1
+    try:
+        # Only `workers` jobs are handed to the pool at a time; the rest
+        # wait here, where a disconnected client's request can be cancelled
+        async with _slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_pool, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run(verify_password, plain, hashed)
+
+
+def password_pool_stats() -> dict:
+    return {
+        "workers": _workers if _pool is not None else 0,
+        "pending": _pending,
+        "max_pending": PASSWORD_MAX_PENDING
+    }
@@ -0,0 +1,96 @@
+import os
+from dotenv import load_dotenv
+
+from services.llm_service import get_ai_response_with_context
+from services.chat_service import (
+    get_chat_summary_async,
+    get_messages_in_range_async,
+    update_chat_summary_async
+)
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+# Re-summarize every N messages, always leaving the newest
+# SUMMARY_TAIL_MESSAGES out of the summary (they go to the prompt verbatim)
+SUMMARY_EVERY = int(os.getenv("SUMMARY_EVERY", "20"))
+SUMMARY_TAIL_MESSAGES = int(os.getenv("SUMMARY_TAIL_MESSAGES", "10"))
+
+# Messages folded in per refresh; older chats catch up over several refreshes
+SUMMARY_MAX_MESSAGES = int(os.getenv("SUMMARY_MAX_MESSAGES", "100"))
+
+
+def summary_due(user_seq: int, ai_seq: int) -> bool:
+    """True when this exchange crossed a multiple of SUMMARY_EVERY."""
+    if SUMMARY_EVERY <= 0 or ai_seq <= SUMMARY_TAIL_MESSAGES:
+        return False
+    return ai_seq // SUMMARY_EVERY != (user_seq - 1) // SUMMARY_EVERY
+
+
+async def summarize_messages(previous_summary: str, messages: list) -> str:
+    """
+    Fold `messages` into the running summary of a conversation.
+    """
+    transcript = "\n".join(
+        f"{'User' if m['sender'] == 'user' else 'Assistant'}: {m['text']}"
+        for m in messages
+    )
+
+    llm_messages = [
+        {
+            "role": "system",
+            "content": (
+                "You maintain a running summary of a conversation. "
+                "Keep facts, decisions, names and open questions. "
+                "Write plain prose, at most 200 words."
+            )
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Current summary:\n{previous_summary or '(none yet)'}\n\n"
+                f"New messages:\n{transcript}\n\n"
+                "Return the updated summary only."
+            )
+        }
+    ]
+
+    summary = await get_ai_response_with_context(llm_messages)
+    return summary.strip()
+
+
+async def refresh_chat_summary(chat_id: str, user_id: int, ai_seq: int) -> bool:
+    """
+    Extend the ChatSession summary up to ai_seq - SUMMARY_TAIL_MESSAGES.
+    True if a new summary was stored.
+    """
+    current = await get_chat_summary_async(chat_id, user_id)
+    if current is None:
+        return False
+
+    upto = ai_seq - SUMMARY_TAIL_MESSAGES
+    if upto <= current["summary_upto"]:
+        return False
+
+    messages = await get_messages_in_range_async(
+        chat_id=chat_id,
+        user_id=user_id,
+        after_sequence=current["summary_upto"],
+        upto_sequence=upto,
+        limit=SUMMARY_MAX_MESSAGES
+    )
+    if not messages:
+        return False
+
+    summary = await summarize_messages(current["summary"], messages)
+    if not summary:
+        return False
+
+    return await update_chat_summary_async(
+        chat_id=chat_id,
+        user_id=user_id,
+        summary=summary,
+        previous_upto=current["summary_upto"],
+        summary_upto=messages[-1]["sequence"]
+    )
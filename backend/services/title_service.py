@@ -6,10 +6,20 @@
 #     return " · ".join(topics[:3])
 
 
-from services.llm_service import get_ai_response_with_context
+from services.llm_service import get_ai_response_with_context, MODEL_NAME
 
+# A chat is titled once, when its third user message is stored. Each
+# exchange stores a user and an AI message, so user messages get
+# sequences 1, 3, 5, ...
+TITLE_AFTER_USER_MESSAGES = 3
 
-async def generate_title_from_messages(messages: list[str]) -> str:
+
+def title_due(user_seq: int) -> bool:
+    """True for the user message that triggers the chat title."""
+    return user_seq == 2 * TITLE_AFTER_USER_MESSAGES - 1
+
+
+async def generate_title_from_messages(messages: list[str], model: str = MODEL_NAME) -> str:
     """
     Generate a short chat title from the first 3 user messages.
     """
@@ -38,6 +48,6 @@ async def generate_title_from_messages(messages: list[str]) -> str:
         }
     ]
 
-    title = await get_ai_response_with_context(llm_messages)
+    title = await get_ai_response_with_context(llm_messages, model=model)
     return title.strip()
 
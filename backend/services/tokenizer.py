@@ -0,0 +1,45 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+# tiktoken encoding used to size prompts. Llama/Mixtral tokenizers differ a
+# little, but cl100k is close enough for budgeting.
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+
+# Role/formatting tokens the chat template adds around every message
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Fallback when tiktoken isn't installed (or can't fetch its encoding)
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception:
+            _encoding = None
+
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(text: str) -> int:
+    """Tokens one chat message costs in the prompt, including overhead."""
+    return count_tokens(text) + MESSAGE_TOKEN_OVERHEAD
@@ -0,0 +1,32 @@
+from services.micro_batcher import MicroBatcher
+
+
+class TopicLinkBuffer(MicroBatcher):
+    """
+    Accumulates topic links from many messages and writes them with one
+    `write_batch(links)` call (chat_service.link_topics_async).
+
+    Callers await add(...); a batch closes at `max_batch_size` links or
+    `max_wait` seconds (see MicroBatcher). Each caller resumes once its
+    links are written, or gets the write's exception, so a job is never
+    completed before its links are stored.
+    """
+
+    def __init__(self, write_batch, max_batch_size: int = 500, max_wait: float = 0.05):
+        super().__init__(self._write_links, max_batch_size, max_wait, weight=len)
+        self._write_batch = write_batch
+        self.stats["links"] = 0
+
+    async def add(self, chat_id: str, user_id: int, message_sequence: int, topics: list):
+        if not topics:
+            return
+
+        await self.submit([
+            {"chat_id": chat_id, "user_id": user_id, "sequence": message_sequence, "topic": topic}
+            for topic in topics
+        ])
+
+    async def _write_links(self, messages: list):
+        links = [link for message in messages for link in message]
+        self.stats["links"] += len(links)
+        await self._write_batch(links)
@@ -1,12 +1,60 @@
+import os
+from dotenv import load_dotenv
 
+from services.llm_service import get_ai_response_with_context, parse_json_reply, MODEL_NAME
+from services.keyphrase_extractor import KeyphraseExtractor
 
-import json
-from services.llm_service import get_ai_response_with_context
+load_dotenv()
 
+# ---------------- CONFIG ----------------
 
-async def extract_topics_llm(text: str) -> list[str]:
+# llm: every message goes to the LLM
+# local: in-process keyphrases only
+# hybrid: keyphrases, escalating to the LLM when confidence is low.
+# Not the default: on benchmarks/bench_topic_extractor the confidence
+# gate doesn't yet keep local topics as good as the LLM's
+TOPIC_EXTRACTOR = os.getenv("TOPIC_EXTRACTOR", "llm")
+TOPIC_LOCAL_MIN_CONFIDENCE = float(os.getenv("TOPIC_LOCAL_MIN_CONFIDENCE", "0.5"))
+
+# Vocabulary size (documents) before local topics are trusted, and how
+# many documents of other users' vocabulary stand in until then. Kept
+# per worker process and rebuilt from traffic after a restart.
+TOPIC_LOCAL_WARMUP_DOCS = int(os.getenv("TOPIC_LOCAL_WARMUP_DOCS", "20"))
+TOPIC_LOCAL_PRIOR_DOCS = int(os.getenv("TOPIC_LOCAL_PRIOR_DOCS", "50"))
+TOPIC_VOCAB_USERS = int(os.getenv("TOPIC_VOCAB_USERS", "10000"))
+
+# Documents a user's / the global vocabulary counts before older ones
+# are aged out (counts halved)
+TOPIC_VOCAB_MAX_DOCS = int(os.getenv("TOPIC_VOCAB_MAX_DOCS", "5000"))
+TOPIC_VOCAB_GLOBAL_MAX_DOCS = int(os.getenv("TOPIC_VOCAB_GLOBAL_MAX_DOCS", "50000"))
+
+KEYPHRASES = KeyphraseExtractor(
+    warmup_docs=TOPIC_LOCAL_WARMUP_DOCS,
+    prior_docs=TOPIC_LOCAL_PRIOR_DOCS,
+    max_users=TOPIC_VOCAB_USERS,
+    max_docs=TOPIC_VOCAB_MAX_DOCS,
+    max_global_docs=TOPIC_VOCAB_GLOBAL_MAX_DOCS
+)
+
+
+def extract_topics_local(user_id: int, text: str):
+    """
+    (topics, confidence) from the in-process extractor. Doesn't touch
+    the vocabulary: call observe_topics_local once the message's job is
+    done, so a retried job isn't counted twice.
+    """
+    return KEYPHRASES.extract(user_id, text, observe=False)
+
+
+def observe_topics_local(user_id: int, text: str):
+    if TOPIC_EXTRACTOR != "llm":
+        KEYPHRASES.observe_text(user_id, text)
+
+
+async def extract_topics_llm(text: str, model: str = MODEL_NAME):
     """
-    Extract 2–4 concise topics from user text.
+    Extract 2–4 concise topics from user text. None when the reply
+    can't be parsed even after repair (as opposed to [] for "no topics").
     """
 
     messages = [
@@ -24,13 +72,11 @@ async def extract_topics_llm(text: str) -> list[str]:
         }
     ]
 
-    response = await get_ai_response_with_context(messages)
+    response = await get_ai_response_with_context(messages, model=model)
 
-    try:
-        topics = json.loads(response)
-        if isinstance(topics, list):
-            return [t.strip() for t in topics][:4]
-    except Exception:
-        pass
+    topics = parse_json_reply(response)
+    if isinstance(topics, list):
+        return [str(t).strip() for t in topics][:4]
 
-    return []
+    print(f"⚠️ Unparseable topics reply: {response[:200]!r}")
+    return None
@@ -68,12 +68,34 @@
 
 
 import os
-import httpx
+import json
+import base64
+import asyncio
+import threading
 import faiss
 import pickle
+import hashlib
 import numpy as np
+from collections import OrderedDict
 from typing import List
 
+from services.http_client import get_http_client, EMBED_HTTP_TIMEOUT
+from services.embedding_batcher import EmbeddingBatcher
+from services.vector_wal import VectorWAL
+from services.metadata_store import MetadataStore
+from services.faiss_index import (
+    FAISS_INDEX_TYPE,
+    FAISS_RERANK_FACTOR,
+    FAISS_STORAGE,
+    build_index,
+    configure,
+    index_type_of,
+    is_lossy,
+    new_index,
+    read_vectors,
+    storage_of
+)
+
 # ---------------- CONFIG ----------------
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -83,28 +105,393 @@ EMBED_MODEL = "text-embedding-3-small"
 
 EMBED_DIM = 1536
 
-FAISS_DIR = "/app/faiss"
-FAISS_INDEX_PATH = f"{FAISS_DIR}/faiss.index"
-META_PATH = f"{FAISS_DIR}/faiss_meta.pkl"
+FAISS_DIR = os.getenv("FAISS_DIR", "/app/faiss")
+FAISS_INDEX_PATH = f"{FAISS_DIR}/faiss.index"  # legacy single global index
+META_PATH = f"{FAISS_DIR}/faiss_meta.pkl"  # legacy pickled metadata list
+METADATA_DIR = f"{FAISS_DIR}/metadata"
+PARTITIONS_DIR = f"{FAISS_DIR}/partitions"
+
+# New vectors go to an append-only log; partitions + metadata are only
+# rewritten by the periodic snapshot (every N records or T seconds)
+VECTOR_WAL_PREFIX = f"{FAISS_DIR}/vectors.wal"
+MANIFEST_PATH = f"{FAISS_DIR}/manifest.json"
+VECTOR_WAL_FSYNC = os.getenv("VECTOR_WAL_FSYNC", "false").lower() == "true"
+VECTOR_SNAPSHOT_EVERY = int(os.getenv("VECTOR_SNAPSHOT_EVERY", "1000"))
+VECTOR_SNAPSHOT_INTERVAL = float(os.getenv("VECTOR_SNAPSHOT_INTERVAL", "300"))
+
+# Exactly one process (the job worker) appends to the store; "reader"
+# processes (the web app) tail its WAL every VECTOR_REFRESH_INTERVAL s
+VECTOR_STORE_ROLE = os.getenv("VECTOR_STORE_ROLE", "writer")
+VECTOR_REFRESH_INTERVAL = float(os.getenv("VECTOR_REFRESH_INTERVAL", "1"))
+IS_WRITER = VECTOR_STORE_ROLE == "writer"
+
+# In-memory LRU size (entries) and optional on-disk tier for embeddings
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_DISK = os.getenv("EMBED_CACHE_DISK", "false").lower() == "true"
+EMBED_CACHE_DIR = f"{FAISS_DIR}/embed_cache"
+# The disk tier is trimmed to this size (least recently used files first)
+# by the writer's snapshot loop
+EMBED_CACHE_DISK_MAX_MB = float(os.getenv("EMBED_CACHE_DISK_MAX_MB", "256"))
+
+# Concurrent embed_text() calls are sent as one array `input` request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "10"))
 
 os.makedirs(FAISS_DIR, exist_ok=True)
 
 # ---------------- LOAD / INIT FAISS ----------------
 
-if os.path.exists(FAISS_INDEX_PATH):
-    index = faiss.read_index(FAISS_INDEX_PATH)
-else:
-    index = faiss.IndexFlatL2(EMBED_DIM)
+# One index per user, so a search only scans that user's vectors.
+# FAISS ids are rows in METADATA.
+USER_INDEXES = {}
+
+
+def _new_partition():
+    return new_index(EMBED_DIM)
+
+
+def _partition_path(user_id: int, directory: str = PARTITIONS_DIR) -> str:
+    return f"{directory}/user_{user_id}.index"
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _save_partition(user_id: int, directory: str = PARTITIONS_DIR):
+    path = _partition_path(user_id, directory)
+    _write_atomic(path, faiss.serialize_index(USER_INDEXES[user_id]).tobytes())
+
+
+def _add_to_partition(user_id: int, rows: np.ndarray, vectors: np.ndarray):
+    partition = USER_INDEXES.get(user_id)
+    if partition is None:
+        partition = USER_INDEXES[user_id] = _new_partition()
+    partition.add_with_ids(vectors, rows.astype("int64"))
+
+
+def _split_legacy_index():
+    """
+    One-off migration: split the old global IndexFlatL2 (row i ==
+    METADATA[i]) into per-user partitions. Written to a temp dir and
+    renamed, so an interrupted migration simply reruns.
+    """
+    legacy = faiss.read_index(FAISS_INDEX_PATH)
+    vectors = legacy.reconstruct_n(0, legacy.ntotal)
+    user_ids = METADATA.user_ids(legacy.ntotal)
+
+    tmp_dir = f"{PARTITIONS_DIR}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    for user_id in np.unique(user_ids):
+        rows = np.flatnonzero(user_ids == user_id)
+        _add_to_partition(int(user_id), rows, vectors[rows])
+        _save_partition(int(user_id), tmp_dir)
+
+    os.replace(tmp_dir, PARTITIONS_DIR)
+
+
+def _read_manifest() -> dict:
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {"rows": 0, "generation": 0}
+
 
-if os.path.exists(META_PATH):
+def _write_manifest(rows: int, generation: int):
+    _write_atomic(
+        MANIFEST_PATH,
+        json.dumps({"rows": rows, "generation": generation}).encode("utf-8")
+    )
+
+
+METADATA = MetadataStore(METADATA_DIR, EMBED_DIM)
+_MANIFEST = _read_manifest()
+
+if IS_WRITER and not METADATA.exists() and os.path.exists(META_PATH):
+    # One-off migration from the pickled list of dicts
     with open(META_PATH, "rb") as f:
-        METADATA = pickle.load(f)
+        legacy_metadata = pickle.load(f)
+    METADATA.write(0, legacy_metadata, np.zeros((0, EMBED_DIM), dtype="float32"))
+    _MANIFEST["rows"] = len(legacy_metadata)
+    _write_manifest(_MANIFEST["rows"], _MANIFEST["generation"])
+    del legacy_metadata
+
+METADATA.load(_MANIFEST["rows"])
+
+if os.path.isdir(PARTITIONS_DIR):
+    for name in os.listdir(PARTITIONS_DIR):
+        if name.startswith("user_") and name.endswith(".index"):
+            USER_INDEXES[int(name[len("user_"):-len(".index")])] = configure(
+                faiss.read_index(f"{PARTITIONS_DIR}/{name}")
+            )
+elif IS_WRITER and os.path.exists(FAISS_INDEX_PATH):
+    _split_legacy_index()
+else:
+    os.makedirs(PARTITIONS_DIR, exist_ok=True)
+
+
+def _backfill_vectors():
+    """
+    One-off: fill the exact-vector column for stores written before it
+    existed, from the (still float32) partitions.
+    """
+    rows = METADATA.persisted_rows
+    vectors = np.zeros((rows, EMBED_DIM), dtype="float32")
+
+    for partition in USER_INDEXES.values():
+        partition_vectors, ids = read_vectors(partition)
+        keep = ids < rows
+        vectors[ids[keep]] = partition_vectors[keep]
+
+    METADATA.write_vectors(0, vectors)
+    METADATA.commit(rows)
+
+
+if IS_WRITER and not METADATA.has_vectors():
+    _backfill_vectors()
+
+# ---------------- WRITE-AHEAD LOG ----------------
+
+_VECTOR_WAL = VectorWAL(VECTOR_WAL_PREFIX, EMBED_DIM, fsync=VECTOR_WAL_FSYNC)
+
+# Guards METADATA / USER_INDEXES / the WAL between the event loop
+# (store_embedding) and the snapshot thread
+_STATE_LOCK = threading.Lock()
+_SNAPSHOT_LOCK = threading.Lock()
+_DIRTY_USERS = set()
+_WAL_STATS = {"records_since_snapshot": 0, "snapshots": 0}
+_snapshot_task = None
+
+# Partitions only ever receive increasing rows, so anything <= a
+# partition's max id is already in it (its snapshot file may be ahead
+# of the manifest after a crash, or while the writer is snapshotting)
+_PARTITION_MAX_ROW = {
+    user_id: int(faiss.vector_to_array(partition.id_map).max(initial=-1))
+    for user_id, partition in USER_INDEXES.items()
+}
+
+# Reader role: next WAL position to tail, [generation, byte offset]
+_WAL_POSITION = [_MANIFEST["generation"], 0]
+
+
+def _apply_wal_record(row: int, user_id: int, vector: np.ndarray, meta: dict):
+    if row == len(METADATA):
+        METADATA.append(meta, vector)
+
+    if row > _PARTITION_MAX_ROW.get(user_id, -1):
+        _add_to_partition(user_id, np.array([row]), vector.reshape(1, -1))
+        _PARTITION_MAX_ROW[user_id] = row
+        _DIRTY_USERS.add(user_id)
+
+
+def _replay_wal() -> int:
+    """
+    Writer role: re-apply log records newer than the last snapshot
+    (covers a crash half-way through a snapshot) and reopen the log.
+    """
+    generation = _MANIFEST["generation"]
+
+    replayed = 0
+    generations = _VECTOR_WAL.generations()
+
+    for wal_generation in generations:
+        for row, user_id, vector, meta in _VECTOR_WAL.replay(wal_generation):
+            if row > len(METADATA):
+                raise RuntimeError(f"Vector WAL gap at row {row} (have {len(METADATA)})")
+            _apply_wal_record(row, user_id, vector, meta)
+            replayed += 1
+
+    _VECTOR_WAL.open(max(generations + [generation]))
+    return replayed
+
+
+def _catch_up_from_snapshot() -> bool:
+    """
+    Reader role: the writer snapshotted and deleted a generation we had
+    not finished tailing. Its rows are in the snapshot now, so map them
+    from the metadata files and continue from the manifest's generation.
+    """
+    manifest = _read_manifest()
+    if manifest["generation"] <= _WAL_POSITION[0]:
+        return False
+
+    start = len(METADATA)
+    rows = manifest["rows"]
+    METADATA.commit(max(rows, METADATA.persisted_rows))
+
+    if rows > start:
+        missing = np.arange(start, rows)
+        user_ids = METADATA.user_ids(rows)[start:]
+        vectors = METADATA.vectors(missing)
+        for user_id in np.unique(user_ids):
+            for i in np.flatnonzero(user_ids == user_id):
+                _apply_wal_record(int(missing[i]), int(user_id), vectors[i], None)
+
+    _WAL_POSITION[:] = [manifest["generation"], 0]
+    return True
+
+
+def refresh_vector_store() -> int:
+    """
+    Reader role: apply the records the writer appended since the last
+    call. Runs on the event loop, like search_partition, so FAISS never
+    sees an add and a search at once. Returns the records applied.
+    """
+    applied = 0
+
+    with _STATE_LOCK:
+        while True:
+            generation, offset = _WAL_POSITION
+            # Checked before reading: once the next generation exists,
+            # this one is complete
+            rotated = os.path.exists(_VECTOR_WAL.path(generation + 1))
+
+            try:
+                records, offset = _VECTOR_WAL.read(generation, offset)
+            except FileNotFoundError:
+                if _catch_up_from_snapshot():
+                    continue
+                break
+
+            gap = False
+            for row, user_id, vector, meta in records:
+                if row > len(METADATA):
+                    gap = True
+                    break
+                _apply_wal_record(row, user_id, vector, meta)
+                applied += 1
+
+            if gap:
+                if _catch_up_from_snapshot():
+                    continue
+                raise RuntimeError(f"Vector WAL gap at row {row} (have {len(METADATA)})")
+
+            if not rotated:
+                _WAL_POSITION[1] = offset
+                break
+            _WAL_POSITION[:] = [generation + 1, 0]
+
+        # Rows the writer has snapshotted since: serve them from the
+        # memory-mapped files instead of the in-memory tail
+        rows = _read_manifest()["rows"]
+        if METADATA.persisted_rows < rows <= len(METADATA):
+            METADATA.commit(rows)
+
+        _DIRTY_USERS.clear()
+
+    return applied
+
+
+if IS_WRITER:
+    _WAL_STATS["records_since_snapshot"] = _replay_wal()
 else:
-    METADATA = []
+    refresh_vector_store()
+
+
+def snapshot_vectors():
+    """
+    Persist dirty partitions + metadata and rotate the WAL. Blocking;
+    call through asyncio.to_thread from async code.
+    """
+    if not IS_WRITER:
+        return
+
+    with _SNAPSHOT_LOCK:
+        # Capture a consistent cut under the state lock, then do the
+        # slow writes without blocking store_embedding
+        with _STATE_LOCK:
+            if not _DIRTY_USERS and _WAL_STATS["records_since_snapshot"] == 0:
+                return
+
+            rows = len(METADATA)
+            metadata_start, metadata_records, metadata_vectors = METADATA.pending()
+            partitions = {
+                user_id: faiss.serialize_index(USER_INDEXES[user_id])
+                for user_id in _DIRTY_USERS
+            }
+            _DIRTY_USERS.clear()
+            _WAL_STATS["records_since_snapshot"] = 0
+
+            generation = _VECTOR_WAL.generation + 1
+            _VECTOR_WAL.open(generation)
+
+        for user_id, data in partitions.items():
+            _write_atomic(_partition_path(user_id), data.tobytes())
+
+        METADATA.write(metadata_start, metadata_records, metadata_vectors)
+        _write_manifest(rows, generation)
+
+        with _STATE_LOCK:
+            METADATA.commit(rows)
+
+        _VECTOR_WAL.remove_before(generation)
+        _WAL_STATS["snapshots"] += 1
+
+
+def rebuild_partitions(index_type: str = FAISS_INDEX_TYPE, storage: str = FAISS_STORAGE) -> dict:
+    """
+    Rebuild every partition as `index_type`/`storage`, training IVF
+    centroids / quantizers on the partition's own exact vectors
+    (too-small partitions stay exact Flat). Folds the WAL into a
+    snapshot first. Blocking, and meant to run with the backend stopped
+    (see rebuild_index.py).
+    """
+    snapshot_vectors()
+
+    built = {}
+    with _SNAPSHOT_LOCK, _STATE_LOCK:
+        for user_id, partition in list(USER_INDEXES.items()):
+            ids = faiss.vector_to_array(partition.id_map).astype("int64")
+            vectors = METADATA.vectors(ids)
+
+            rebuilt = USER_INDEXES[user_id] = build_index(vectors, ids, index_type, storage)
+            _save_partition(user_id)
+            built[user_id] = (f"{index_type_of(rebuilt)}/{storage_of(rebuilt)}", len(ids))
+
+    return built
+
+
+def _schedule_snapshot():
+    global _snapshot_task
+
+    if _snapshot_task is None or _snapshot_task.done():
+        _snapshot_task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(snapshot_vectors)
+        )
+
+
+async def run_vector_snapshots():
+    """
+    Background loop started with the app: snapshot every
+    VECTOR_SNAPSHOT_INTERVAL seconds (store_embedding also triggers one
+    every VECTOR_SNAPSHOT_EVERY records).
+    """
+    while True:
+        await asyncio.sleep(VECTOR_SNAPSHOT_INTERVAL)
+        await asyncio.to_thread(snapshot_vectors)
+        await asyncio.to_thread(prune_embed_cache)
+
+
+async def run_vector_refresh():
+    """Reader-role counterpart of run_vector_snapshots."""
+    while True:
+        await asyncio.sleep(VECTOR_REFRESH_INTERVAL)
+        refresh_vector_store()
+
+
+def close_vector_store():
+    snapshot_vectors()
+    _VECTOR_WAL.close()
 
 # ---------------- EMBEDDING ----------------
 
-async def embed_text(text: str) -> List[float]:
+async def embed_texts(texts: List[str]) -> List[List[float]]:
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json"
@@ -112,60 +499,233 @@ async def embed_text(text: str) -> List[float]:
 
     payload = {
         "model": EMBED_MODEL,
-        "input": text
+        "input": texts
     }
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.post(EMBED_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    response = await get_http_client().post(
+        EMBED_URL,
+        headers=headers,
+        json=payload,
+        timeout=EMBED_HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    # Results carry their input position; don't rely on response order
+    items = sorted(data["data"], key=lambda item: item["index"])
+    return [item["embedding"] for item in items]
+
+
+embedding_batcher = EmbeddingBatcher(
+    embed_texts,
+    max_batch_size=EMBED_BATCH_SIZE,
+    max_wait=EMBED_BATCH_WAIT_MS / 1000
+)
+
+
+async def embed_text(text: str) -> List[float]:
+    return await embedding_batcher.embed(text)
+
+# ---------------- EMBEDDING CACHE ----------------
+
+# Content-addressed: key = sha256(model + text), value = float32 vector.
+# The query embedded by search_similar is reused by store_embedding
+# for the same message instead of calling the API twice: in-process
+# through this cache, from the web app to worker.py through the embed
+# job's `vector` (cached_embedding / encode_vector).
+_EMBED_CACHE = OrderedDict()
+EMBED_CACHE_STATS = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def _embed_cache_key(text: str) -> str:
+    return hashlib.sha256(f"{EMBED_MODEL}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _embed_cache_path(key: str) -> str:
+    return f"{EMBED_CACHE_DIR}/{key[:2]}/{key}.npy"
+
+
+def _embed_cache_put(key: str, vector: np.ndarray, persist: bool = True):
+    _EMBED_CACHE[key] = vector
+    _EMBED_CACHE.move_to_end(key)
+
+    while len(_EMBED_CACHE) > EMBED_CACHE_SIZE:
+        _EMBED_CACHE.popitem(last=False)
+
+    if persist and EMBED_CACHE_DISK:
+        path = _embed_cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, vector)
+        os.replace(tmp_path, path)
+
+
+def _embed_cache_get(key: str):
+    vector = _EMBED_CACHE.get(key)
+    if vector is not None:
+        _EMBED_CACHE.move_to_end(key)
+        EMBED_CACHE_STATS["hits"] += 1
+        return vector
+
+    if EMBED_CACHE_DISK:
+        path = _embed_cache_path(key)
+        try:
+            vector = np.load(path)
+            os.utime(path)  # recently used: pruned last
+        except (FileNotFoundError, ValueError):
+            vector = None
+        if vector is not None:
+            _embed_cache_put(key, vector, persist=False)
+            EMBED_CACHE_STATS["disk_hits"] += 1
+            return vector
+
+    EMBED_CACHE_STATS["misses"] += 1
+    return None
+
+
+def prune_embed_cache(max_bytes: int = None) -> int:
+    """
+    Delete the least recently used disk-tier files until the tier is
+    under EMBED_CACHE_DISK_MAX_MB. Returns the number of files removed.
+    """
+    if not EMBED_CACHE_DISK or not os.path.isdir(EMBED_CACHE_DIR):
+        return 0
+    if max_bytes is None:
+        max_bytes = int(EMBED_CACHE_DISK_MAX_MB * 1024 * 1024)
+
+    files = []
+    total = 0
+    for shard in os.scandir(EMBED_CACHE_DIR):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    removed = 0
+    files.sort()
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def cached_embedding(text: str):
+    """
+    The vector for `text` if this process already has it in memory
+    (e.g. the query search_similar just embedded), else None. No API call.
+    """
+    return _EMBED_CACHE.get(_embed_cache_key(text))
 
-    return data["data"][0]["embedding"]
+
+def encode_vector(vector: np.ndarray) -> str:
+    """float32 vector as base64, for job payloads."""
+    return base64.b64encode(np.asarray(vector, dtype="float32").tobytes()).decode("ascii")
+
+
+def decode_vector(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype="float32")
+
+
+async def get_embedding(text: str) -> np.ndarray:
+    """
+    Cached embed_text(): returns a float32 vector of shape (EMBED_DIM,).
+    """
+    key = _embed_cache_key(text)
+
+    vector = _embed_cache_get(key)
+    if vector is None:
+        vector = np.asarray(await embed_text(text), dtype="float32")
+        _embed_cache_put(key, vector)
+
+    return vector
 
 # ---------------- STORE EMBEDDING ----------------
 
-async def store_embedding(user_id: int, message_id: str, text: str):
-    embedding = await embed_text(text)
+async def store_embedding(user_id: int, message_id: str, text: str, vector: str = None):
+    """
+    `vector`: encode_vector() of the text's embedding when the enqueuing
+    process already has it, so the worker doesn't embed it again.
+    """
+    if not IS_WRITER:
+        raise RuntimeError("store_embedding needs VECTOR_STORE_ROLE=writer (the job worker)")
 
-    # ✅ Convert to NumPy float32, shape (1, dim)
-    vector = np.array([embedding], dtype="float32")
+    embedding = decode_vector(vector) if vector else None
+    if embedding is None or embedding.shape != (EMBED_DIM,):
+        embedding = await get_embedding(text)
 
-    index.add(vector)
+    # ✅ Shape (1, dim) for FAISS
+    vector = embedding.reshape(1, -1)
 
-    METADATA.append({
+    meta = {
         "user_id": user_id,
         "message_id": message_id,
         "text": text
-    })
+    }
+
+    # O(1) persistence: one log append; files are rewritten by snapshots
+    with _STATE_LOCK:
+        row = len(METADATA)
+        _VECTOR_WAL.append(row, user_id, embedding, meta)
+
+        METADATA.append(meta, embedding)
+        _add_to_partition(user_id, np.array([row]), vector)
+        _DIRTY_USERS.add(user_id)
 
-    faiss.write_index(index, FAISS_INDEX_PATH)
-    with open(META_PATH, "wb") as f:
-        pickle.dump(METADATA, f)
+        _WAL_STATS["records_since_snapshot"] += 1
+        snapshot_due = _WAL_STATS["records_since_snapshot"] >= VECTOR_SNAPSHOT_EVERY
+
+    if snapshot_due:
+        _schedule_snapshot()
 
 # ---------------- SEMANTIC SEARCH ----------------
 
-async def search_similar(user_id: int, query: str, top_k: int = 3):
-    if index.ntotal == 0:
+def search_partition(user_id: int, query_vector: np.ndarray, top_k: int) -> List[int]:
+    """
+    METADATA rows of the user's top_k nearest vectors (fewer only if
+    the user has fewer than top_k stored).
+    """
+    partition = USER_INDEXES.get(user_id)
+    if partition is None or partition.ntotal == 0:
         return []
 
-    query_embedding = await embed_text(query)
+    # Compressed codes only approximate distances: over-fetch, then
+    # re-rank the candidates against the exact vectors on disk
+    lossy = is_lossy(partition)
+    k = top_k * FAISS_RERANK_FACTOR if lossy else top_k
 
-    # ✅ Convert query to NumPy
-    query_vector = np.array([query_embedding], dtype="float32")
+    distances, ids = partition.search(query_vector, min(k, partition.ntotal))
+    rows = [int(row) for row in ids[0] if row != -1]
 
-    distances, indices = index.search(query_vector, top_k * 5)
+    if lossy and rows:
+        exact = METADATA.vectors(rows)
+        exact_distances = ((exact - query_vector) ** 2).sum(axis=1)
+        rows = [rows[i] for i in np.argsort(exact_distances)[:top_k]]
 
-    results = []
-    for idx in indices[0]:
-        if idx == -1:
-            continue
+    return rows
 
-        meta = METADATA[idx]
-        if meta["user_id"] != user_id:
-            continue
 
-        results.append(meta["text"])
-        if len(results) == top_k:
-            break
+async def search_similar(user_id: int, query: str, top_k: int = 3):
+    partition = USER_INDEXES.get(user_id)
+    if partition is None or partition.ntotal == 0:
+        return []
+
+    query_embedding = await get_embedding(query)
+
+    # ✅ Shape (1, dim) for FAISS
+    query_vector = query_embedding.reshape(1, -1)
 
-    return results
+    rows = search_partition(user_id, query_vector, top_k)
+    return METADATA.texts(rows)
@@ -0,0 +1,128 @@
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Record layout (little-endian):
+#   header  <II   body length, crc32(body)
+#   body    <qq   row, user_id
+#           float32[dim] vector
+#           utf-8 JSON metadata
+HEADER = struct.Struct("<II")
+ROW_USER = struct.Struct("<qq")
+
+
+class VectorWAL:
+    """
+    Append-only log of vectors + metadata records, one file per
+    generation: `<prefix>.<generation>`. Appending costs O(1) regardless
+    of corpus size; a snapshot rotates to the next generation and the
+    older files are deleted once the snapshot is on disk.
+    """
+
+    def __init__(self, prefix: str, dim: int, fsync: bool = False):
+        self.prefix = prefix
+        self.dim = dim
+        self.fsync = fsync
+        self.generation = None
+        self._file = None
+
+    def path(self, generation: int) -> str:
+        return f"{self.prefix}.{generation}"
+
+    def generations(self) -> list:
+        directory, base = os.path.split(self.prefix)
+        found = []
+        for name in os.listdir(directory or "."):
+            if name.startswith(base + "."):
+                suffix = name[len(base) + 1:]
+                if suffix.isdigit():
+                    found.append(int(suffix))
+        return sorted(found)
+
+    def open(self, generation: int):
+        if self._file is not None:
+            self._file.close()
+        self.generation = generation
+        self._file = open(self.path(generation), "ab")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, row: int, user_id: int, vector: np.ndarray, meta: dict):
+        body = (
+            ROW_USER.pack(row, user_id)
+            + np.ascontiguousarray(vector, dtype="float32").tobytes()
+            + json.dumps(meta).encode("utf-8")
+        )
+        self._file.write(HEADER.pack(len(body), zlib.crc32(body)) + body)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _records(self, f, start: int):
+        """
+        Yields (end_offset, row, user_id, vector, meta) for each complete
+        record from `start`; stops at the first torn or corrupt one.
+        """
+        vector_size = self.dim * 4
+        offset = start
+        f.seek(start)
+
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+
+            length, crc = HEADER.unpack(header)
+            body = f.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                return
+
+            row, user_id = ROW_USER.unpack_from(body)
+            begin = ROW_USER.size
+            vector = np.frombuffer(body, dtype="float32", count=self.dim, offset=begin)
+            meta = json.loads(body[begin + vector_size:].decode("utf-8"))
+
+            offset += HEADER.size + length
+            yield offset, row, user_id, vector, meta
+
+    def replay(self, generation: int):
+        """
+        Yields (row, user_id, vector, meta) from one generation file. A torn
+        or corrupt tail (crash mid-append) ends the replay and is truncated
+        so later appends don't land behind garbage.
+        """
+        path = self.path(generation)
+        valid_length = 0
+
+        with open(path, "rb") as f:
+            for valid_length, row, user_id, vector, meta in self._records(f, 0):
+                yield row, user_id, vector, meta
+
+        if os.path.getsize(path) != valid_length:
+            with open(path, "r+b") as f:
+                f.truncate(valid_length)
+
+    def read(self, generation: int, offset: int = 0):
+        """
+        Read-only tail for another process's log: (records, new_offset),
+        records as (row, user_id, vector, meta) from `offset`. An
+        incomplete last record is left alone (the writer may be mid-append)
+        and read on the next call.
+        """
+        records = []
+        with open(self.path(generation), "rb") as f:
+            for offset_after, row, user_id, vector, meta in self._records(f, offset):
+                records.append((row, user_id, vector, meta))
+                offset = offset_after
+        return records, offset
+
+    def remove_before(self, generation: int):
+        for old in self.generations():
+            if old < generation:
+                os.remove(self.path(old))
@@ -0,0 +1,312 @@
+"""
+Job worker: runs the post-message work the web app enqueues
+(topics + title, rolling summary, embeddings), outside the web process.
+
+    cd backend
+    python worker.py                          # every job type
+    python worker.py --types topics summary   # scale these separately
+
+Embedding jobs append to the FAISS store, which has a single writer:
+run exactly one worker that includes `embed`, and as many without it
+as the topic / summary backlog needs.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOB_TYPES = ("topics", "summary", "embed")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--types", nargs="+", choices=JOB_TYPES, default=list(JOB_TYPES))
+args = parser.parse_args()
+
+if "embed" in args.types:
+    os.environ["VECTOR_STORE_ROLE"] = "writer"
+
+from services.job_queue import JOB_QUEUE, publish_cache_events  # noqa: E402
+from services.http_client import init_http_client, close_http_client  # noqa: E402
+from services.enrichment_service import enrich_messages  # noqa: E402
+from services.topic_service import observe_topics_local  # noqa: E402
+from services.title_service import TITLE_AFTER_USER_MESSAGES, title_due  # noqa: E402
+from services.cache_service import TTLCache  # noqa: E402
+from services.summary_service import refresh_chat_summary  # noqa: E402
+from services.topic_link_buffer import TopicLinkBuffer  # noqa: E402
+from services.chat_service import (  # noqa: E402
+    link_topics_async,
+    get_first_user_messages_async,
+    update_chat_title_if_empty_async
+)
+from neo4j_db import close_neo4j  # noqa: E402
+
+# ---------------- CONFIG ----------------
+
+# Per job type: concurrent batches in flight, and jobs claimed per batch
+# (topic batches share one enrichment call, embed batches one embeddings call)
+CONCURRENCY = {
+    job_type: int(os.getenv(f"WORKER_CONCURRENCY_{job_type.upper()}", "2"))
+    for job_type in JOB_TYPES
+}
+BATCH_SIZE = {
+    "topics": int(os.getenv("WORKER_BATCH_TOPICS", "8")),
+    "summary": int(os.getenv("WORKER_BATCH_SUMMARY", "1")),
+    "embed": int(os.getenv("WORKER_BATCH_EMBED", "32"))
+}
+
+# Idle wait between polls of an empty queue
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "0.5"))
+WORKER_PURGE_INTERVAL = 600
+
+# Topic links from concurrent topic jobs are written in one UNWIND batch
+TOPIC_LINK_BATCH_SIZE = int(os.getenv("TOPIC_LINK_BATCH_SIZE", "500"))
+TOPIC_LINK_WAIT_MS = float(os.getenv("TOPIC_LINK_WAIT_MS", "50"))
+
+topic_links = TopicLinkBuffer(
+    link_topics_async,
+    max_batch_size=TOPIC_LINK_BATCH_SIZE,
+    max_wait=TOPIC_LINK_WAIT_MS / 1000
+)
+
+# Chats this process has titled, so a retried or duplicate trigger
+# skips the LLM; the Cypher write is guarded by `title IS NULL` anyway
+TITLED_CHATS = TTLCache(
+    int(os.getenv("TITLED_CHATS_SIZE", "10000")),
+    float(os.getenv("TITLED_CHATS_TTL", "86400"))
+)
+
+# chat_id -> future of the job generating its title right now
+_titles_inflight = {}
+
+# ---------------- HANDLERS ----------------
+
+# Each takes a batch of jobs and returns one result per job: an
+# exception marks that job for retry
+
+
+def _own_title(payload: dict) -> bool:
+    """
+    Claim the title for this job's chat if this message triggers it and
+    no other job has it (checked and set without awaiting in between).
+    """
+    chat_id = payload["chat_id"]
+    if not title_due(payload["user_seq"]) or TITLED_CHATS.get(chat_id) or chat_id in _titles_inflight:
+        return False
+
+    _titles_inflight[chat_id] = asyncio.get_running_loop().create_future()
+    return True
+
+
+def _release_title(chat_id: str, error: Exception = None):
+    """
+    Only a successful release marks the chat titled; on error the next
+    retry / re-lease of the triggering job can claim the title again.
+    """
+    future = _titles_inflight.pop(chat_id)
+    if error is None:
+        TITLED_CHATS.set(chat_id, True)
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+        future.exception()  # waiters re-raise it; don't log as unretrieved
+
+
+async def _title_messages(payload: dict, owns_title: bool):
+    if not owns_title:
+        return None
+
+    # Sent by the route from the history it already loaded; read from
+    # the graph only when that history didn't reach back to message 1
+    user_messages = payload.get("title_messages") or await get_first_user_messages_async(
+        chat_id=payload["chat_id"],
+        user_id=payload["user_id"],
+        limit=TITLE_AFTER_USER_MESSAGES
+    )
+    return user_messages if len(user_messages) == TITLE_AFTER_USER_MESSAGES else None
+
+
+async def _apply_enrichment(payload: dict, enrichment: dict, owns_title: bool):
+    chat_id = payload["chat_id"]
+
+    try:
+        await topic_links.add(
+            chat_id=chat_id,
+            user_id=payload["user_id"],
+            message_sequence=payload["user_seq"],
+            topics=enrichment["topics"]
+        )
+
+        if owns_title:
+            # Only the 3rd user message triggers the title: without one,
+            # fail the job so its retry gets another chance
+            if not enrichment["title"]:
+                raise RuntimeError("no title generated")
+
+            # False: the chat already had a title, which is just as final
+            titled = await update_chat_title_if_empty_async(
+                chat_id=chat_id,
+                user_id=payload["user_id"],
+                title=enrichment["title"]
+            )
+            if titled:
+                # Sidebar pages cached by the web app
+                await publish_cache_events([("chat_sessions", payload["user_id"])])
+    except Exception as e:
+        if owns_title:
+            _release_title(chat_id, e)
+        raise
+
+    if owns_title:
+        _release_title(chat_id)
+    elif title_due(payload["user_seq"]) and chat_id in _titles_inflight:
+        # Same trigger already being handled (e.g. a re-leased job):
+        # finish with that one instead of generating a second title
+        await asyncio.shield(_titles_inflight[chat_id])
+
+
+async def handle_topics(jobs: list) -> list:
+    # Topics and (when due) the title for the whole batch in at most one
+    # LLM call; confident local topics skip it entirely
+    owns_title = [_own_title(job.payload) for job in jobs]
+
+    try:
+        title_messages = await asyncio.gather(*(
+            _title_messages(job.payload, owns) for job, owns in zip(jobs, owns_title)
+        ))
+        enrichments = await enrich_messages([
+            (job.payload["user_id"], job.payload["text"], messages)
+            for job, messages in zip(jobs, title_messages)
+        ])
+    except Exception as e:
+        for job, owns in zip(jobs, owns_title):
+            if owns:
+                _release_title(job.payload["chat_id"], e)
+        raise
+
+    results = await asyncio.gather(
+        *(
+            _apply_enrichment(job.payload, enrichment, owns)
+            for job, enrichment, owns in zip(jobs, enrichments, owns_title)
+        ),
+        return_exceptions=True
+    )
+
+    # Local topic vocabulary counts each message once, when its job is done
+    for job, result in zip(jobs, results):
+        if not isinstance(result, BaseException):
+            observe_topics_local(job.payload["user_id"], job.payload["text"])
+
+    return results
+
+
+async def _refresh_summary(payload: dict):
+    chat_id, user_id = payload["chat_id"], payload["user_id"]
+    if await refresh_chat_summary(chat_id, user_id, payload["ai_seq"]):
+        # Prompt tails cached by the web app, extended in place on every
+        # send, would otherwise keep the old summary
+        await publish_cache_events([("chat_history", [user_id, chat_id])])
+
+
+async def handle_summary(jobs: list) -> list:
+    return await asyncio.gather(
+        *(_refresh_summary(job.payload) for job in jobs),
+        return_exceptions=True
+    )
+
+
+async def handle_embed(jobs: list) -> list:
+    from services.vector_service import store_embedding
+
+    # Concurrent calls are coalesced by the embedding batcher
+    return await asyncio.gather(
+        *(store_embedding(**job.payload) for job in jobs),
+        return_exceptions=True
+    )
+
+
+HANDLERS = {
+    "topics": handle_topics,
+    "summary": handle_summary,
+    "embed": handle_embed
+}
+
+# ---------------- LOOPS ----------------
+
+
+async def _idle(stop: asyncio.Event, seconds: float):
+    try:
+        await asyncio.wait_for(stop.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def run_slot(job_type: str, stop: asyncio.Event):
+    handler = HANDLERS[job_type]
+
+    while not stop.is_set():
+        jobs = await asyncio.to_thread(JOB_QUEUE.claim, job_type, BATCH_SIZE[job_type])
+        if not jobs:
+            await _idle(stop, WORKER_POLL_INTERVAL)
+            continue
+
+        try:
+            results = await handler(jobs)
+        except Exception as e:
+            results = [e] * len(jobs)
+
+        done = [job.id for job, result in zip(jobs, results) if not isinstance(result, BaseException)]
+        if done:
+            await asyncio.to_thread(JOB_QUEUE.complete, done)
+
+        for job, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ {job_type} job {job.id} failed (attempt {job.attempts}): {result!r}")
+                await asyncio.to_thread(JOB_QUEUE.fail, job, repr(result))
+
+
+async def run_purge(stop: asyncio.Event):
+    while not stop.is_set():
+        await asyncio.to_thread(JOB_QUEUE.purge)
+        await _idle(stop, WORKER_PURGE_INTERVAL)
+
+
+async def main():
+    init_http_client()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    background = [asyncio.create_task(run_purge(stop))]
+    if "embed" in args.types:
+        from services.vector_service import run_vector_snapshots
+        background.append(asyncio.create_task(run_vector_snapshots()))
+
+    slots = [
+        run_slot(job_type, stop)
+        for job_type in args.types
+        for _ in range(CONCURRENCY[job_type])
+    ]
+    print(f">>> Worker running: {', '.join(f'{t} x{CONCURRENCY[t]}' for t in args.types)}")
+
+    # Slots finish the batch in hand before exiting; unfinished leases
+    # would be retried anyway after JOB_LEASE
+    await asyncio.gather(*slots)
+
+    for task in background:
+        task.cancel()
+    if "embed" in args.types:
+        from services.vector_service import close_vector_store
+        await asyncio.to_thread(close_vector_store)
+    await asyncio.to_thread(close_neo4j)
+    await close_http_client()
+    print(">>> Worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,7 +3,7 @@
 import { useEffect, useRef, useState } from "react";
 import {
   startChat,
-  sendMessage,
+  sendMessageStream,
   getHistory,
   getChatSessions
 } from "../services/api";
@@ -16,8 +16,10 @@ export default function Chat({ onLogout }) {
   const token = localStorage.getItem("token");
 
   const [sessions, setSessions] = useState([]);
+  const [sessionsCursor, setSessionsCursor] = useState(null);
   const [chatId, setChatId] = useState(null);
   const [messages, setMessages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [input, setInput] = useState("");
   const sendingRef = useRef(false);
   const [loading, setLoading] = useState(false);
@@ -30,6 +32,7 @@ export default function Chat({ onLogout }) {
       try {
         const res = await getChatSessions(token);
         setSessions(res.sessions || []);
+        setSessionsCursor(res.next_cursor ?? null);
       } catch (err) {
         console.error("Failed to load sessions", err);
       }
@@ -37,6 +40,17 @@ export default function Chat({ onLogout }) {
     loadSessions();
   }, [token]);
 
+  async function handleLoadMoreSessions() {
+    if (!sessionsCursor) return;
+    try {
+      const res = await getChatSessions(token, sessionsCursor);
+      setSessions((prev) => [...prev, ...(res.sessions || [])]);
+      setSessionsCursor(res.next_cursor ?? null);
+    } catch (err) {
+      console.error("Failed to load more sessions", err);
+    }
+  }
+
   /* ---------------- Select chat & load history ---------------- */
 
   async function handleSelectChat(id) {
@@ -44,11 +58,23 @@ export default function Chat({ onLogout }) {
       setChatId(id);
       const history = await getHistory(id, token);
       setMessages(Array.isArray(history.messages) ? history.messages : []);
+      setNextCursor(history.next_cursor ?? null);
     } catch (err) {
       console.error("Failed to load chat history", err);
     }
   }
 
+  async function handleLoadOlder() {
+    if (nextCursor == null) return;
+    try {
+      const history = await getHistory(chatId, token, nextCursor);
+      setMessages((prev) => [...(history.messages || []), ...prev]);
+      setNextCursor(history.next_cursor ?? null);
+    } catch (err) {
+      console.error("Failed to load older messages", err);
+    }
+  }
+
   /* ---------------- Start new chat ---------------- */
 
   async function handleNewChat() {
@@ -56,10 +82,12 @@ export default function Chat({ onLogout }) {
       const res = await startChat(token);
       setChatId(res.chat_id);
       setMessages([]);
+      setNextCursor(null);
       setInput("");
 
       const updated = await getChatSessions(token);
       setSessions(updated.sessions || []);
+      setSessionsCursor(updated.next_cursor ?? null);
     } catch (err) {
       console.error("Failed to start new chat", err);
     }
@@ -83,13 +111,19 @@ export default function Chat({ onLogout }) {
     ]);
 
     try {
-      const res = await sendMessage(chatId, userText, token);
-      if (res?.reply) {
-        setMessages((prev) => [
-          ...prev,
-          { sender: "ai", text: res.reply }
-        ]);
-      }
+      let started = false;
+      await sendMessageStream(chatId, userText, token, (delta) => {
+        if (!started) {
+          started = true;
+          setLoading(false);
+          setMessages((prev) => [...prev, { sender: "ai", text: delta }]);
+          return;
+        }
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + delta }];
+        });
+      });
 
       // Refresh sidebar titles
       // const updated = await getChatSessions(token);
@@ -118,6 +152,8 @@ export default function Chat({ onLogout }) {
         activeChatId={chatId}
         onSelectChat={handleSelectChat}
         onNewChat={handleNewChat}
+        hasMore={sessionsCursor != null}
+        onLoadMore={handleLoadMoreSessions}
       />
 
       <div className="chat-container">
@@ -135,6 +171,11 @@ export default function Chat({ onLogout }) {
         ) : (
           <>
             <div className="chat-messages">
+              {nextCursor != null && (
+                <button className="load-older-btn" onClick={handleLoadOlder}>
+                  Load earlier messages
+                </button>
+              )}
               {messages.map((m, i) => (
                 <div
                   key={i}
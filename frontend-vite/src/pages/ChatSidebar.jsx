@@ -2,7 +2,9 @@ export default function ChatSidebar({
   sessions,
   activeChatId,
   onSelectChat,
-  onNewChat
+  onNewChat,
+  hasMore,
+  onLoadMore
 }) {
   return (
     <div className="chat-sidebar">
@@ -33,6 +35,12 @@ export default function ChatSidebar({
             </div>
           </div>
         ))}
+
+        {hasMore && (
+          <button className="load-older-btn" onClick={onLoadMore}>
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );
@@ -44,8 +44,65 @@ export async function sendMessage(chatId, message, token) {
   return res.json();
 }
 
-export async function getHistory(chatId, token) {
-  const res = await fetch(`${BASE_URL}/chat/${chatId}/history`, {
+/*
+ * Streams the reply over SSE. onToken is called with each text delta;
+ * resolves with the full reply once the server sends the "done" event
+ * (the reply is stored), and rejects on an "error" event or a stream that
+ * ends without "done".
+ */
+export async function sendMessageStream(chatId, message, token, onToken) {
+  const res = await fetch(`${BASE_URL}/chat/${chatId}/message/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify({message}),
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error(`Stream request failed: ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === "error") throw new Error(payload.detail);
+      if (event === "done") return payload.reply;
+
+      onToken(payload.token);
+    }
+  }
+
+  // Only `done` means the reply was stored
+  throw new Error("Stream ended before the reply was saved");
+}
+
+// Latest page by default; pass next_cursor as `before` for older messages
+export async function getHistory(chatId, token, before = null) {
+  const query = before != null ? `?before=${before}` : "";
+  const res = await fetch(`${BASE_URL}/chat/${chatId}/history${query}`, {
     headers: {
       Authorization: `Bearer ${token}`,
     },
@@ -53,8 +110,10 @@ export async function getHistory(chatId, token) {
   return res.json();
 }
 
-export async function getChatSessions(token) {
-  const res = await fetch(`${BASE_URL}/chat/sessions`, {
+// Most recently active first; pass next_cursor as `cursor` for the next page
+export async function getChatSessions(token, cursor = null) {
+  const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+  const res = await fetch(`${BASE_URL}/chat/sessions${query}`, {
     headers: {
       Authorization: `Bearer ${token}`,
     },